@@ -1,15 +1,962 @@
+import argparse  # Kommandozeilenparameter für die Stapelverarbeitung
+import bisect  # Position des aktuellen Bildes in einer neu sortierten Liste finden
+import hashlib  # Dateinamen für den Festplatten-Cache
+import io  # Seiten einer PDF im Speicher als JPEG kodieren
+import json  # Protokoll der Messungen im JSON-Lines-Format
+import math
 import os
 import random
+import sqlite3  # Persistenter Index der Bilder
+import sys
+import threading  # Für das Vorladen der Bilder im Hintergrund
+from array import array  # Kompakte Speicherung von Permutation und Drehwinkeln
+from collections import OrderedDict, deque  # Für den LRU-Bildcache und die Messfenster
+from contextlib import nullcontext  # Leerer Span, wenn die Messung ausgeschaltet ist
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED  # Hintergrund-Worker
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial, lru_cache  # Effekt-Funktionen mit festen Parametern (auch für Prozesse)
+import pickle
 import customtkinter as ctk  # Bibliothek für eine benutzerdefinierte grafische Oberfläche
 from PIL import Image, ImageTk, ImageFilter, ExifTags, ImageOps  # Bibliothek für Bildverarbeitung
+import numpy as np  # Für die vektorisierte Zusammensetzung der Bildteile
 import time  # Zum Messen der Zeit
+import traceback  # Fehler im Render-Thread ausgeben, ohne den Thread zu beenden
+
+BASE_EFFECTS = ["gaussian", "box", "min", "max", "grayscale", "solarize", "posterize", "invert"]
+# Vorgefertigte Effektketten; die Schritte werden nacheinander angewendet, Pixel-Effekte zu einer Tabelle verschmolzen
+EFFECT_PRESETS = ["gaussian+posterize+invert", "gaussian+grayscale", "box+solarize", "max+posterize"]
+BLUR_METHODS = BASE_EFFECTS + EFFECT_PRESETS
+IMAGE_EXTENSIONS = ('png', 'jpg', 'jpeg')  # Unterstützte Bildformate
+SAVE_FORMATS = {"jpg": "JPEG", "png": "PNG", "pdf": "PDF"}  # Dateiendung -> Pillow-Format
+POINT_EFFECTS = ["grayscale", "solarize", "posterize", "invert"]  # Effekte, die jedes Pixel einzeln verändern
+RANK_FILTERS = {"min": np.minimum, "max": np.maximum}  # Rangfilter mit eigener, radiusunabhängiger Umsetzung
+RANK_FILTER_MODES = ("L", "LA", "RGB", "RGBA", "RGBX", "CMYK", "YCbCr", "HSV")  # Modi mit 8 Bit je Kanal
+
+
+# Misst die Dauer benannter Abschnitte (Spans) der Bildverarbeitung. Ausgeschaltet liefert span() nur
+# einen leeren Kontext; eingeschaltet werden die letzten Messungen je Abschnitt für p50/p95 behalten
+# und optional als JSON-Lines protokolliert.
+class Profiler:
+    NULL_SPAN = nullcontext()  # Wiederverwendbarer leerer Kontext
+
+    def __init__(self, window_size=200):
+        self.enabled = False
+        self.window_size = window_size  # Anzahl der Messungen pro Abschnitt für die Perzentile
+        self.durations = {}  # Abschnitt -> deque der letzten Dauern in ms
+        self.log_file = None  # Offene JSON-Lines-Datei oder None
+        self.lock = threading.Lock()  # Messungen kommen aus mehreren Threads
+
+    # Schaltet die Messung ein, optional mit Protokolldatei
+    def enable(self, log_path=None):
+        if log_path:
+            self.log_file = open(log_path, "a", buffering=1, encoding="utf-8")
+        self.enabled = True
+
+    # Gibt einen Kontextmanager zurück, der die Dauer des Abschnitts misst
+    def span(self, name):
+        if not self.enabled:
+            return self.NULL_SPAN
+        return ProfilerSpan(self, name)
+
+    # Speichert eine Messung und schreibt sie ins Protokoll
+    def record(self, name, duration_ms):
+        with self.lock:
+            durations = self.durations.get(name)
+            if durations is None:
+                durations = self.durations[name] = deque(maxlen=self.window_size)
+            durations.append(duration_ms)
+            if self.log_file is not None:
+                self.log_file.write(json.dumps({"time": time.time(), "stage": name, "ms": round(duration_ms, 3),
+                                                "thread": threading.current_thread().name}) + "\n")
+
+    # Gibt für jeden Abschnitt (p50, p95, Anzahl) der letzten Messungen zurück
+    def percentiles(self):
+        with self.lock:
+            snapshot = {name: sorted(durations) for name, durations in self.durations.items()}
+        return {name: (values[len(values) // 2], values[min(len(values) - 1, int(len(values) * 0.95))], len(values))
+                for name, values in snapshot.items() if values}
+
+    # Text für die Anzeige über dem Bild
+    def summary_text(self):
+        lines = [f"{name:<12} p50 {p50:7.1f} ms  p95 {p95:7.1f} ms"
+                 for name, (p50, p95, _) in sorted(self.percentiles().items())]
+        return "\n".join(lines)
+
+
+# Ein laufender Messabschnitt des Profilers
+class ProfilerSpan:
+    __slots__ = ("profiler", "name", "start_time")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        self.profiler.record(self.name, (time.perf_counter() - self.start_time) * 1000)
+        return False
+
+
+profiler = Profiler()  # Gemeinsamer Profiler für alle Abschnitte
+
+
+# Lädt ein Bild von der Festplatte, korrigiert die Orientierung und skaliert es auf die Canvas-Größe
+def load_base_image(image_path, canvas_width, canvas_height, manual_rotation=0):
+    with profiler.span("decode"):
+        image = Image.open(image_path)
+
+        # JPEGs direkt verkleinert dekodieren (Draft-Modus), damit nie das volle Bild im Speicher liegt.
+        # Die Zielgröße ist quadratisch, damit auch nach einer 90°-Drehung genug Auflösung vorhanden ist.
+        if image.format == "JPEG":
+            target_size = max(canvas_width, canvas_height)
+            image.draft("RGB", (target_size, target_size))
+        image.load()
+
+    with profiler.span("exif"):
+        image = convert_for_effects(correct_orientation(image))  # Erst danach umwandeln, sonst fehlen die Exif-Daten
+
+    # Bild manuell rotieren, wenn der Benutzer es festgelegt hat
+    with profiler.span("rotate"):
+        image = image.rotate(manual_rotation, expand=True)
+    # Bild auf die gewünschte Größe skalieren
+    with profiler.span("resize"):
+        return image.resize((canvas_width, canvas_height), Image.LANCZOS)
+
+
+# Lädt ein Bild in voller Auflösung, mit korrigierter Orientierung und manueller Drehung (für den Export)
+def load_full_image(image_path, manual_rotation=0):
+    image = Image.open(image_path)
+    image.load()
+    image = convert_for_effects(correct_orientation(image))
+    return image.rotate(manual_rotation, expand=True) if manual_rotation else image
+
+
+# Bringt ein Bild in einen Modus, den alle Effekte verarbeiten können: Paletten- und Sondermodi (P, 1, I;16, CMYK, ...)
+# werden zu RGB, bzw. zu RGBA, wenn sie Transparenz enthalten. Graustufen- und RGB(A)-Bilder bleiben unverändert.
+def convert_for_effects(image):
+    if image.mode in ("L", "RGB", "RGBA"):
+        return image
+    if "A" in image.getbands() or "transparency" in image.info:
+        return image.convert("RGBA")
+    return image.convert("RGB")
+
+
+# JPEG und PDF können keinen Alphakanal speichern; der Alphakanal wird dafür verworfen
+def convert_for_format(image, pillow_format):
+    if pillow_format in ("JPEG", "PDF") and image.mode not in ("L", "RGB"):
+        return image.convert("RGB")
+    return image
+
+
+# Exif-Daten auslesen, um die Bildorientierung zu korrigieren
+def correct_orientation(image):
+    try:
+        for orientation in ExifTags.TAGS.keys():
+            if ExifTags.TAGS[orientation] == 'Orientation':
+                break
+        exif = image._getexif()
+
+        # Überprüft die Orientierung und dreht das Bild falls nötig
+        if exif is not None:
+            orientation_value = exif.get(orientation, None)
+            if orientation_value == 3:
+                image = image.rotate(180, expand=True)
+            elif orientation_value == 6:
+                image = image.rotate(270, expand=True)
+            elif orientation_value == 8:
+                image = image.rotate(90, expand=True)
+    except (AttributeError, KeyError, IndexError):
+        pass
+    return image
+
+
+# Minimum/Maximum über ein Fenster der Breite 2 * radius + 1 entlang einer Achse (van Herk/Gil-Werman).
+# Das Bild wird in Blöcke der Fensterbreite geteilt; pro Block werden Präfix- und Suffix-Extrema berechnet,
+# sodass jedes Fenster aus genau zwei Werten entsteht – der Aufwand pro Pixel hängt nicht vom Radius ab.
+def van_herk_filter_1d(pixels, radius, reduce, axis):
+    size = 2 * radius + 1
+    pixels = np.moveaxis(pixels, axis, 0)
+    length = pixels.shape[0]
+    padded_length = -(-(length + 2 * radius) // size) * size
+    # Randpixel wiederholen, so wie Pillow das Bild vor dem Rangfilter erweitert
+    padding = [(radius, padded_length - length - radius)] + [(0, 0)] * (pixels.ndim - 1)
+    padded = np.pad(pixels, padding, mode="edge")
+    blocks = padded.reshape((padded_length // size, size) + pixels.shape[1:])
+    prefix = reduce.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = reduce.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+    return np.moveaxis(reduce(suffix[:length], prefix[size - 1:size - 1 + length]), 0, axis)
+
+
+# Wendet den Rangfilter nacheinander entlang aller angegebenen Achsen an (das quadratische Fenster ist separierbar)
+def rank_filter(pixels, radius, reduce, axes=(0, 1)):
+    for axis in axes:
+        pixels = van_herk_filter_1d(pixels, radius, reduce, axis)
+    return np.ascontiguousarray(pixels)
+
+
+# Wendet einen Effekt mit der angegebenen Stärke auf das Bild an (ohne Effekt bleibt das Bild unverändert)
+def apply_effect(image, blur_type, blur_level):
+    if blur_type and "+" in blur_type:
+        return apply_effect_chain(image, blur_type, blur_level)
+    with profiler.span("effect"):
+        if blur_type:
+            blur_methods = {
+                "gaussian": ImageFilter.GaussianBlur(radius=blur_level),
+                "box": ImageFilter.BoxBlur(radius=blur_level),
+                "min": ImageFilter.MinFilter(size=blur_level * 2 + 1),
+                "max": ImageFilter.MaxFilter(size=blur_level * 2 + 1)
+            }
+
+            selected_filter = blur_methods.get(blur_type)
+            if blur_type in RANK_FILTERS and blur_level == 0:
+                return image.copy()  # Ein 1×1-Rangfilter ändert nichts (und bringt manche Pillow-Versionen zum Absturz)
+            elif blur_type in RANK_FILTERS and image.mode in RANK_FILTER_MODES:
+                # Eigene Umsetzung statt MinFilter/MaxFilter, deren Aufwand quadratisch mit dem Radius wächst
+                pixels = rank_filter(np.asarray(image), blur_level, RANK_FILTERS[blur_type])
+                return Image.fromarray(pixels, image.mode)
+            elif selected_filter:
+                return image.filter(selected_filter)
+            elif blur_type == "grayscale":
+                return ImageOps.grayscale(image)
+            elif blur_type in POINT_LUTS and image.mode not in ("L", "RGB"):
+                image = image.convert("RGB")  # Wie in Effektketten: Tabellen gelten nur für Farbkanäle, nicht für Alpha
+
+            if blur_type == "solarize":
+                return ImageOps.solarize(image, threshold=128)
+            elif blur_type == "posterize":
+                return ImageOps.posterize(image, bits=2)
+            elif blur_type == "invert":
+                return ImageOps.invert(image)
+
+        return image  # Return the image unchanged if no blur type is selected
+
+
+# Wertetabellen der Pixel-Effekte, identisch mit ImageOps.invert, solarize(threshold=128) und posterize(bits=2)
+POINT_LUTS = {
+    "invert": [255 - value for value in range(256)],
+    "solarize": [value if value < 128 else 255 - value for value in range(256)],
+    "posterize": [value & ~(2 ** (8 - 2) - 1) for value in range(256)],
+}
+
+
+# Prüft, ob ein Effekt (oder jeder Schritt einer Kette wie "gaussian+invert") bekannt ist
+def is_valid_effect(blur_type):
+    return all(step in BASE_EFFECTS for step in blur_type.split("+"))
+
+
+# Prüft, ob ein Effekt (oder jeder Schritt einer Kette) nur einzelne Pixel verändert
+def is_point_effect(blur_type):
+    return all(step in POINT_EFFECTS for step in blur_type.split("+"))
+
+
+# Übersetzt eine Effektkette in möglichst wenige Durchläufe. Jede Stufe ist (Filter, Tabelle davor, Graustufen,
+# Tabelle danach): ein Filter läuft allein, aufeinanderfolgende Pixel-Effekte werden zu einer Tabelle pro Kanal
+# zusammengesetzt. Graustufen mischen die Kanäle (wie convert("L")); Tabellen danach wirken auf das Graubild.
+@lru_cache(maxsize=None)
+def compile_effect_chain(blur_type):
+    stages = []
+    for step in blur_type.split("+"):
+        if step not in POINT_EFFECTS:
+            stages.append((step, None, False, None))
+            continue
+        if not stages or stages[-1][0] is not None:
+            stages.append((None, None, False, None))
+        _, lut_before, grayscale, lut_after = stages[-1]
+        if step == "grayscale":
+            grayscale = True  # Ein zweites Graustufen-Bild ändert nichts mehr
+        elif grayscale:
+            lut_after = [POINT_LUTS[step][value] for value in (lut_after or range(256))]
+        else:
+            lut_before = [POINT_LUTS[step][value] for value in (lut_before or range(256))]
+        stages[-1] = (None, lut_before, grayscale, lut_after)
+    return tuple(stages)
+
+
+# Wendet eine Effektkette an, z.B. "gaussian+posterize+invert" – der Radius gilt für alle Filter der Kette.
+# Eine Kette kostet damit etwa so viel wie ihre Filter plus ein Tabellen-Durchlauf.
+def apply_effect_chain(image, blur_type, blur_level):
+    for step, lut_before, grayscale, lut_after in compile_effect_chain(blur_type):
+        if step is not None:
+            image = apply_effect(image, step, blur_level)
+            continue
+        with profiler.span("effect"):
+            if image.mode not in ("L", "RGB"):
+                image = image.convert("RGB")  # Tabellen gelten nur für Farbkanäle, nicht für Alpha oder Paletten
+            if lut_before is not None:
+                image = image.point(lut_before * len(image.getbands()))
+            if grayscale:
+                image = image.convert("L")  # (R*19595 + G*38470 + B*7471 + 0x8000) >> 16, wie ImageOps.grayscale
+            if lut_after is not None:
+                image = image.point(lut_after)
+    return image
+
+
+# Anzahl der Nachbarpixel je Seite, die ein Effekt mit diesem Radius braucht, damit Blöcke nahtlos aneinanderpassen
+def effect_halo(blur_type, radius):
+    if blur_type and "+" in blur_type:
+        return sum(effect_halo(step, radius) for step in blur_type.split("+"))  # Filter einer Kette addieren sich
+    if blur_type == "gaussian":
+        return 3 * (math.ceil(radius) + 1)  # Pillow nähert die Gauß-Unschärfe mit drei Box-Durchläufen an
+    if blur_type == "box":
+        return math.ceil(radius) + 1
+    if blur_type in RANK_FILTERS:
+        return radius
+    return 0  # Pixel-Effekte brauchen keine Nachbarn
+
+
+# Gemessener Arbeitsspeicher je Pixel eines Export-Blocks samt Überlappung: Pillow belegt 4 Bytes je Pixel (L: 1 Byte)
+# und beim Filtern liegen bis zu vier Bilder gleichzeitig im Speicher (Ausschnitt, Ergebnis, Zuschnitt, Drehung),
+# dazu etwa ein Bild Verschnitt der Speicherverwaltung. Die Rangfilter brauchen zusätzlich bis zu 4 Bytes je Kanal
+# für ihre NumPy-Puffer.
+def export_bytes_per_pixel(blur_type, mode):
+    bytes_per_pixel = 5 * (1 if mode == "L" else 4)
+    if blur_type and any(step in RANK_FILTERS for step in blur_type.split("+")):
+        bytes_per_pixel += 4 * Image.getmodebands(mode)
+    return bytes_per_pixel
+
+
+# Größe der Export-Blöcke (Breite, Höhe), sodass ein Block samt halo Pixeln Überlappung auf jeder Seite in
+# memory_budget passt. Ein quadratischer Ausschnitt hat bei gleichem Speicher die wenigste Überlappung. Bei großen
+# Radien werden kleine Blöcke mehrfach gefiltert; ein Block ist aber nie kleiner als die Überlappung (höchstens
+# neunfache Arbeit). Nur wenn nicht einmal das ins Budget passt, wird es überschritten.
+def export_block_size(width, height, halo, memory_budget, bytes_per_pixel):
+    pixels = max(memory_budget // bytes_per_pixel, 1)
+    minimum = max(halo, 1)
+    block_width = min(max(math.isqrt(pixels) - 2 * halo, minimum), width)
+    context_width = min(block_width + 2 * halo, width)
+    block_height = min(max(pixels // context_width - 2 * halo, minimum), height)
+    return block_width, block_height
+
+
+# Wendet den Effekt blockweise auf den Ausschnitt box an und liefert (Spaltenversatz, Zeilenversatz, Block).
+# Jeder Block wird mit halo Pixeln Kontext aus box gefiltert und danach zugeschnitten; das Ergebnis ist
+# dasselbe, als würde der ganze Ausschnitt auf einmal gefiltert.
+def filter_in_blocks(image, box, blur_type, radius, block_size):
+    left, top, right, bottom = box
+    block_width, block_height = block_size
+    halo = effect_halo(blur_type, radius)
+    for block_top in range(top, bottom, block_height):
+        block_bottom = min(block_top + block_height, bottom)
+        context_top = max(block_top - halo, top)
+        context_bottom = min(block_bottom + halo, bottom)
+        for block_left in range(left, right, block_width):
+            block_right = min(block_left + block_width, right)
+            context_left = max(block_left - halo, left)
+            context_right = min(block_right + halo, right)
+            context = (context_left, context_top, context_right, context_bottom)
+            block = apply_effect(image.crop(context), blur_type, radius)
+            if context != (block_left, block_top, block_right, block_bottom):
+                block = block.crop((block_left - context_left, block_top - context_top,
+                                    block_right - context_left, block_bottom - context_top))
+            yield block_left - left, block_top - top, block
+
+
+# Position eines Blocks (ab Spalte x, Zeile y eines Teils der Größe tile_width×tile_height) im gegen den
+# Uhrzeigersinn gedrehten Teil
+def rotated_block_position(rotation, x, y, block_size, tile_size):
+    (block_width, block_height), (tile_width, tile_height) = block_size, tile_size
+    if rotation == 90:
+        return y, tile_width - x - block_width
+    if rotation == 180:
+        return tile_width - x - block_width, tile_height - y - block_height
+    if rotation == 270:
+        return tile_height - y - block_height, x
+    return x, y
+
+
+# Rendert ein Bild in voller Auflösung. Der Effekt (mit bereits skaliertem Radius) und optional die Anordnung
+# der Teile (Gittergröße, Permutation, Drehungen) werden Block für Block angewendet und direkt in das einzige
+# Ergebnisbild eingefügt, sodass neben Quelle und Ergebnis nur ein Block (höchstens memory_budget) im Speicher liegt,
+# bei gedrehten, zurückskalierten Teilen zusätzlich das Teil selbst. Die Teile
+# werden in Reihenfolge der Positionen eingefügt. Sind die Teile auf dem Canvas quadratisch (canvas_size), füllt
+# ein um 90° gedrehtes Teil dort wieder sein Feld; im Export wird es daher gedreht und auf seine Box skaliert.
+# Nur bei nicht quadratischen Canvas-Teilen überlappen sich gedrehte Teile wie in compose_with_paste.
+# pillow_format legt fest, ob ein Alphakanal erhalten bleiben kann.
+def render_full_resolution(source, pillow_format, blur_type, radius, tile_layout=None,
+                           memory_budget=256 * 1024 * 1024, canvas_size=None):
+    source = convert_for_effects(source)  # Paletten (P) würden sonst ohne Palette in das Ergebnis eingefügt
+    width, height = source.size
+    if tile_layout is None:
+        placements = [((0, 0, width, height), (0, 0), 0)]
+    else:
+        grid, permutation, rotations = tile_layout
+        tile_width, tile_height = width // grid, height // grid
+        placements = []
+        for position, tile_index in enumerate(permutation):
+            source_row, source_column = divmod(tile_index, grid)
+            row, column = divmod(position, grid)
+            box = (source_column * tile_width, source_row * tile_height,
+                   (source_column + 1) * tile_width, (source_row + 1) * tile_height)
+            placements.append((box, (column * tile_width, row * tile_height), rotations[position]))
+    square_canvas_tiles = (tile_layout is not None and canvas_size is not None
+                           and canvas_size[0] // tile_layout[0] == canvas_size[1] // tile_layout[0])
+
+    output = None
+    halo = effect_halo(blur_type, radius)
+    bytes_per_pixel = export_bytes_per_pixel(blur_type, source.mode)
+    for box, (x, y), rotation in placements:
+        tile_width, tile_height = box[2] - box[0], box[3] - box[1]
+        block_size = export_block_size(tile_width, tile_height, halo, memory_budget, bytes_per_pixel)
+        # Gedrehte Teile, die in ihre Box zurückskaliert werden, sammeln ihre Blöcke zuerst in einem Teil-Puffer
+        fit_to_box = square_canvas_tiles and rotation in (90, 270) and tile_width != tile_height
+        tile_buffer = None
+        for block_x, block_y, block in filter_in_blocks(source, box, blur_type, radius, block_size):
+            if output is None:
+                # Zerteilte Bilder sind wie auf dem Canvas immer RGB; JPEG und PDF können keinen Alphakanal speichern
+                mode = "RGB" if tile_layout is not None else block.mode
+                if pillow_format in ("JPEG", "PDF") and mode not in ("L", "RGB"):
+                    mode = "RGB"
+                output = Image.new(mode, source.size)
+            if fit_to_box:
+                if tile_buffer is None:
+                    tile_buffer = Image.new(block.mode, (tile_width, tile_height))
+                tile_buffer.paste(block, (block_x, block_y))
+                continue
+            dx, dy = rotated_block_position(rotation, block_x, block_y, block.size, (tile_width, tile_height))
+            output.paste(block.rotate(rotation, expand=True) if rotation else block, (x + dx, y + dy))
+        if tile_buffer is not None:
+            rotated = tile_buffer.rotate(rotation, expand=True)
+            output.paste(rotated.resize((tile_width, tile_height), Image.LANCZOS), (x, y))
+    return output
+
+
+# Eine Seite eines Exports: Momentaufnahme der Einstellungen, damit weiteres Klicken den Export nicht verändert
+class ExportPage:
+    def __init__(self, image_path, manual_rotation, blur_type, blur_level, canvas_size, tile_layout=None):
+        self.image_path = image_path
+        self.manual_rotation = manual_rotation
+        self.blur_type = blur_type
+        self.blur_level = blur_level  # Stufe bezogen auf die Canvas-Größe
+        self.canvas_size = canvas_size
+        self.tile_layout = tile_layout  # (Gittergröße, Permutation, Drehungen) oder None
+
+    # Rendert die Seite in der Auflösung des Originals
+    def render(self, pillow_format, memory_budget=256 * 1024 * 1024):
+        with profiler.span("export"):
+            source = load_full_image(self.image_path, self.manual_rotation)
+            # Die Anzeige streckt das Bild auf die Canvas-Größe; der Radius wird mit dem geometrischen Mittel
+            # beider Skalierungsfaktoren vergrößert, damit der Effekt im Export genauso stark wirkt
+            canvas_width, canvas_height = self.canvas_size
+            scale = math.sqrt(source.width / canvas_width * source.height / canvas_height)
+            radius = round(self.blur_level * scale)
+            return render_full_resolution(source, pillow_format, self.blur_type, radius, self.tile_layout,
+                                          memory_budget, self.canvas_size)
+
+
+# Liest Größe und Exif-Orientierung eines Bildes, ohne es zu dekodieren; defekte Dateien gelten als ungültig
+def read_image_metadata(image_path):
+    try:
+        with Image.open(image_path) as image:
+            width, height = image.size
+            orientation = image.getexif().get(0x0112, 1)  # Exif-Tag "Orientation"
+        return width, height, orientation, 1
+    except (OSError, SyntaxError, ValueError):
+        return 0, 0, 1, 0
+
+
+# Persistenter Index (SQLite) aller Bilder eines Ordners mit Größe, Orientierung und Gültigkeit.
+# Der Ordner wird nur neu eingelesen, wenn sich seine Änderungszeit geändert hat, und dabei werden nur
+# neue oder geänderte Dateien aktualisiert; die Bildköpfe werden später im Hintergrund gelesen.
+class ImageIndex:
+    def __init__(self, image_folder, index_path=None):
+        self.image_folder = image_folder
+        self.index_path = index_path or os.path.join(image_folder, ".bilder_index.sqlite")
+        self.version = 0  # Wird erhöht, sobald sich der Inhalt des Index ändert
+        self.lock = threading.Lock()  # Der Index wird vom Render- und vom Hintergrund-Thread benutzt
+        self.connection = sqlite3.connect(self.index_path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS images (
+                name TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER,
+                width INTEGER, height INTEGER, orientation INTEGER, valid INTEGER)""")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER)")
+
+    # Gleicht den Index mit dem Ordner ab; ohne force nur, wenn sich der Ordner geändert hat
+    def refresh(self, force=False):
+        folder_mtime = os.stat(self.image_folder).st_mtime_ns
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM state WHERE key = 'folder_mtime'").fetchone()
+        if not force and row is not None and row[0] == folder_mtime:
+            return False
+
+        files = {}
+        for entry in os.scandir(self.image_folder):
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                stat = entry.stat()
+                files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock, self.connection:
+            known = {name: (mtime, size) for name, mtime, size in
+                     self.connection.execute("SELECT name, mtime_ns, size FROM images")}
+            removed = [(name,) for name in known.keys() - files.keys()]
+            changed = [(name, mtime, size) for name, (mtime, size) in files.items() if known.get(name) != (mtime, size)]
+            self.connection.executemany("DELETE FROM images WHERE name = ?", removed)
+            # Neue oder geänderte Dateien ohne Metadaten eintragen; diese werden von fill_metadata ergänzt
+            self.connection.executemany("""INSERT OR REPLACE INTO images (name, mtime_ns, size) VALUES (?, ?, ?)""", changed)
+            self.connection.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('folder_mtime', ?)", (folder_mtime,))
+            if removed or changed:
+                self.version += 1
+        return True
+
+    # Liest die Bildköpfe aller Dateien, deren Metadaten noch fehlen
+    def fill_metadata(self, batch_size=200):
+        while True:
+            with self.lock:
+                names = [name for (name,) in self.connection.execute(
+                    "SELECT name FROM images WHERE width IS NULL LIMIT ?", (batch_size,))]
+            if not names:
+                return
+            rows = [read_image_metadata(os.path.join(self.image_folder, name)) + (name,) for name in names]
+            with self.lock, self.connection:
+                self.connection.executemany(
+                    "UPDATE images SET width = ?, height = ?, orientation = ?, valid = ? WHERE name = ?", rows)
+                self.version += 1
+
+    # Prüft im Hintergrund alle Dateien (auch unverändert benannte) und ergänzt die Metadaten
+    def start_background_refresh(self):
+        def run():
+            try:
+                self.refresh(force=True)
+                self.fill_metadata()
+            except (OSError, sqlite3.Error):
+                traceback.print_exc()
+        threading.Thread(target=run, name="image-index", daemon=True).start()
+
+    # Markiert ein Bild als ungültig, z.B. wenn es sich nicht öffnen ließ
+    def mark_invalid(self, image_path):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE images SET width = 0, height = 0, valid = 0 WHERE name = ?",
+                                    (os.path.basename(image_path),))
+            self.version += 1
+
+    # Prüft, ob noch Bilder ohne Metadaten (Größe, Orientierung) im Index stehen
+    def metadata_pending(self):
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM images WHERE width IS NULL LIMIT 1").fetchone() is not None
+
+    # Gibt die Pfade der gültigen Bilder zurück, optional gefiltert nach Mindestauflösung (in Pixeln)
+    # und Orientierung ("landscape", "portrait" oder "square", nach Anwendung der Exif-Drehung)
+    def query(self, min_resolution=0, orientation=None):
+        conditions = ["(valid IS NULL OR valid = 1)"]
+        parameters = []
+        if min_resolution or orientation:
+            conditions.append("width IS NOT NULL")  # Für Filter werden die Metadaten benötigt
+        if min_resolution:
+            conditions.append("width * height >= ?")
+            parameters.append(min_resolution)
+        if orientation:
+            # Bei den Exif-Orientierungen 5–8 sind Breite und Höhe in der Anzeige vertauscht
+            display_width = "(CASE WHEN orientation IN (5, 6, 7, 8) THEN height ELSE width END)"
+            display_height = "(CASE WHEN orientation IN (5, 6, 7, 8) THEN width ELSE height END)"
+            comparison = {"landscape": ">", "portrait": "<", "square": "="}[orientation]
+            conditions.append(f"{display_width} {comparison} {display_height}")
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT name FROM images WHERE {' AND '.join(conditions)} ORDER BY name", parameters).fetchall()
+        return [os.path.join(self.image_folder, name) for (name,) in rows]
+
+
+# Begrenzter LRU-Cache für dekodierte und auf Canvas-Größe skalierte Bilder
+class ImageCache:
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes  # Maximaler Speicherverbrauch aller Einträge
+        self.current_bytes = 0  # Aktueller Speicherverbrauch
+        self.entries = OrderedDict()  # Einträge in LRU-Reihenfolge (ältester zuerst)
+        self.lock = threading.Lock()  # Der Cache wird auch vom Prefetcher-Thread benutzt
+
+    # Erzeugt den Schlüssel (Pfad, Änderungszeit, Dateigröße, Canvas-Größe, manuelle Drehung) für ein Bild
+    @staticmethod
+    def make_key(image_path, canvas_width, canvas_height, manual_rotation):
+        stat = os.stat(image_path)
+        return image_path, stat.st_mtime_ns, stat.st_size, canvas_width, canvas_height, manual_rotation
+
+    # Schätzt den Speicherbedarf eines Bildes in Bytes
+    @staticmethod
+    def image_size_in_bytes(image):
+        width, height = image.size
+        return width * height * len(image.getbands())
+
+    # Gibt das Bild zum Schlüssel zurück (oder None) und markiert es als zuletzt benutzt
+    def get(self, key):
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+            return image
+
+    # Speichert ein Bild und entfernt die ältesten Einträge, bis das Speicherlimit eingehalten wird
+    def put(self, key, image):
+        size = self.image_size_in_bytes(image)
+        if size > self.max_bytes:
+            return  # Zu groß für den Cache
+        with self.lock:
+            if key in self.entries:
+                self.current_bytes -= self.image_size_in_bytes(self.entries.pop(key))
+            self.entries[key] = image
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.current_bytes -= self.image_size_in_bytes(evicted)
+
+    # Leert den Cache vollständig
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+
+# LRU-Cache der gefilterten Bildteile, Schlüssel (Bildschlüssel, Gittergröße, Blur-Typ, Stufe, Teilindex)
+class TileCache(ImageCache):
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        super().__init__(max_bytes)
+
+    # Speicherbedarf eines Teils (uint32-Array mit RGBX-Pixeln)
+    @staticmethod
+    def image_size_in_bytes(tile):
+        return tile.nbytes
+
+
+# Inhaltsadressierter Cache auf der Festplatte für skalierte Bilder und Effekt-Stufen, damit sie einen
+# Neustart überleben. Die Einträge sind rohe .npy-Arrays (per mmap lesbar); bei Überschreiten der
+# Maximalgröße werden die am längsten nicht benutzten Dateien gelöscht.
+class DiskCache:
+    STORABLE_MODES = ("L", "RGB", "RGBA")  # Bildmodi, die sich ohne Zusatzinformationen als Array speichern lassen
+
+    def __init__(self, cache_folder, max_bytes=1024 * 1024 * 1024):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes  # Maximale Größe aller Dateien im Cache
+        self.lock = threading.Lock()
+        os.makedirs(cache_folder, exist_ok=True)
+        self.current_bytes = sum(entry.stat().st_size for entry in os.scandir(cache_folder) if entry.name.endswith(".npy"))
+
+    # Gibt den Dateipfad zum Schlüssel zurück
+    def _path(self, key):
+        return os.path.join(self.cache_folder, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".npy")
+
+    # Liest ein Array (oder None) und markiert den Eintrag als zuletzt benutzt
+    def get(self, key):
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode="r")
+            os.utime(path)  # Die Änderungszeit dient als LRU-Zeitstempel
+            return array
+        except (OSError, ValueError):
+            return None
+
+    # Speichert ein Bild oder Array und räumt danach bei Bedarf auf
+    def put(self, key, value):
+        if isinstance(value, Image.Image):
+            if value.mode not in self.STORABLE_MODES:
+                return
+            value = np.asarray(value)
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            with open(temporary_path, "wb") as file:
+                np.save(file, value)
+            os.replace(temporary_path, path)
+        except OSError:
+            return  # Festplatte voll oder nicht beschreibbar: ohne Cache weiterarbeiten
+        with self.lock:
+            self.current_bytes += os.path.getsize(path)
+            if self.current_bytes > self.max_bytes:
+                self._evict()
+
+    # Löscht die ältesten Einträge, bis die Maximalgröße eingehalten wird
+    def _evict(self):
+        entries = sorted((entry for entry in os.scandir(self.cache_folder) if entry.name.endswith(".npy")),
+                         key=lambda entry: entry.stat().st_mtime_ns)
+        self.current_bytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self.current_bytes <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self.current_bytes -= size
+            except OSError:
+                pass
+
+
+# Bereitet die nächsten Bilder der Liste im Hintergrund vor, bevor sie angezeigt werden
+class ImagePrefetcher:
+    def __init__(self, image_cache, loader=None):
+        self.image_cache = image_cache
+        self.loader = loader or (lambda key, *arguments: load_base_image(*arguments))  # Lädt ein Bild zum Schlüssel
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self.pending = {}  # Schlüssel -> Future der gerade vorbereiteten Bilder
+        self.lock = threading.Lock()
+
+    # Stellt die angegebenen Bilder in die Warteschlange, sofern sie nicht schon im Cache liegen
+    def prefetch(self, image_paths, canvas_width, canvas_height):
+        for image_path in image_paths:
+            try:
+                key = ImageCache.make_key(image_path, canvas_width, canvas_height, 0)
+            except OSError:
+                continue  # Datei nicht mehr vorhanden, Fehler tritt beim Anzeigen auf
+            with self.lock:
+                if key in self.pending or self.image_cache.get(key) is not None:
+                    continue
+                self.pending[key] = self.executor.submit(self._load, key, image_path, canvas_width, canvas_height)
+
+    # Wartet auf ein Bild, das gerade im Hintergrund geladen wird, und gibt es zurück (oder None)
+    def wait_for(self, key):
+        with self.lock:
+            future = self.pending.get(key)
+        if future is None:
+            return None
+        return future.result()
+
+    # Lädt ein Bild im Hintergrund-Thread und legt es im Cache ab
+    def _load(self, key, image_path, canvas_width, canvas_height):
+        try:
+            image = self.loader(key, image_path, canvas_width, canvas_height, 0)
+            self.image_cache.put(key, image)
+            return image
+        except OSError:
+            return None  # Defekte Datei, der Fehler wird beim Anzeigen gemeldet
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+
+# Wendet eine Funktion parallel auf viele Bildteile an. Standardmäßig mit Threads (Pillow gibt beim
+# Filtern den GIL frei), optional mit Prozessen; kleine Gitter werden seriell bearbeitet, weil sich
+# dort der Verteilungsaufwand nicht lohnt.
+class TileExecutor:
+    def __init__(self, max_workers=None, use_processes=False, min_parallel_tiles=16):
+        self.max_workers = max_workers or os.cpu_count() or 1  # Anzahl der Worker
+        self.use_processes = use_processes  # Prozesse statt Threads verwenden
+        self.min_parallel_tiles = min_parallel_tiles  # Ab dieser Anzahl Teile wird parallel gearbeitet
+        self.executor = None  # Pool wird erst bei Bedarf erzeugt
+        self.lock = threading.Lock()
+
+    # Erzeugt den Pool beim ersten Gebrauch
+    def _get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                if self.use_processes:
+                    self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tiles")
+            return self.executor
+
+    # Wendet die Funktion auf alle Elemente an und gibt die Ergebnisse in derselben Reihenfolge zurück
+    def map(self, function, items):
+        items = list(items)
+        if self.max_workers <= 1 or len(items) < self.min_parallel_tiles:
+            return [function(item) for item in items]
+        executor = self._get_executor()
+        if not self.use_processes:
+            return list(executor.map(function, items))
+        try:
+            chunksize = max(1, len(items) // (self.max_workers * 4))
+            return list(executor.map(function, items, chunksize=chunksize))
+        except (BrokenProcessPool, pickle.PicklingError, AttributeError):
+            # Prozesse stehen nicht zur Verfügung oder die Funktion ist nicht übertragbar: auf Threads ausweichen
+            self.shutdown()
+            self.use_processes = False
+            return self.map(function, items)
+
+    # Beendet den Pool
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+
+# Kompakte Darstellung des zerteilten Bildes: ein Basisbild, eine Permutation und ein Drehwinkel pro Teil
+class SplitLayout:
+    __slots__ = ("base", "grid_size", "tile_width", "tile_height", "permutation", "rotations", "_base_tiles", "_buffer")
+
+    def __init__(self, base, grid_size, permutation):
+        self.base = base  # Unverändertes Basisbild, aus dem alle Teile stammen
+        self.grid_size = grid_size
+        self.tile_width = base.width // grid_size
+        self.tile_height = base.height // grid_size
+        self.permutation = array("H", permutation)  # Position im Gitter -> Index des Quellteils
+        self.rotations = array("H", [0] * len(permutation))  # Drehwinkel pro Position im Gitter
+        self._base_tiles = None  # Quellteile des Basisbildes ohne Effekt (werden nur einmal erzeugt)
+        self._buffer = None  # Wiederverwendeter Ausgabepuffer für die Zusammensetzung
+
+    # Dreht alle Teile um den angegebenen Winkel
+    def rotate(self, angle):
+        for position, rotation in enumerate(self.rotations):
+            self.rotations[position] = (rotation + angle) % 360
+
+    # Gibt die Box (links, oben, rechts, unten) eines Quellteils im Basisbild zurück
+    def tile_box(self, tile_index):
+        row, column = divmod(tile_index, self.grid_size)
+        left = column * self.tile_width
+        top = row * self.tile_height
+        return left, top, left + self.tile_width, top + self.tile_height
+
+    # Wandelt ein Bild in ein 2D-Array mit einem uint32 (RGBX) pro Pixel um
+    @staticmethod
+    def to_pixels(image):
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        width, height = image.size
+        return np.frombuffer(image.tobytes("raw", "RGBX"), dtype=np.uint32).reshape(height, width)
+
+    # Wendet den Effekt an und liefert alle Quellteile als Array (Teil, Höhe, Breite) mit RGBX-Pixeln.
+    # Ohne Effekt (effect=None) werden die Teile des Basisbildes wiederverwendet. Pixel-Effekte werden
+    # einmal auf das ganze Bild angewendet, Filter dagegen auf jedes Teil einzeln, da sie an den
+    # Rändern der Teile anders wirken als im ganzen Bild; dafür kann ein TileExecutor angegeben werden.
+    def filter_tiles(self, effect, per_pixel, tile_executor=None, tile_indices=None):
+        grid, tile_width, tile_height = self.grid_size, self.tile_width, self.tile_height
+        if effect is None and self._base_tiles is not None:
+            return self._base_tiles
+        if effect is None or per_pixel:
+            image = self.base if effect is None else effect(self.base)
+            pixels = self.to_pixels(image)[:grid * tile_height, :grid * tile_width]
+            blocks = pixels.reshape(grid, tile_height, grid, tile_width).swapaxes(1, 2)
+            tiles = blocks.reshape(grid * grid, tile_height, tile_width)
+            if effect is None:
+                self._base_tiles = tiles
+            return tiles if tile_indices is None else tiles[list(tile_indices)]
+
+        # Nur die angefragten Teile (Standard: alle) ausschneiden und filtern
+        if tile_indices is None:
+            tile_indices = range(grid * grid)
+        pieces = [self.base.crop(self.tile_box(tile_index)) for tile_index in tile_indices]
+        if tile_executor is None:
+            filtered_pieces = map(effect, pieces)
+        else:
+            filtered_pieces = tile_executor.map(effect, pieces)
+
+        tiles = np.empty((len(pieces), tile_height, tile_width), dtype=np.uint32)
+        for position, piece in enumerate(filtered_pieces):
+            tiles[position] = self.to_pixels(piece)
+        return tiles
+
+    # Wendet einen Rangfilter (min/max) in einem einzigen Durchlauf auf alle Quellteile gleichzeitig an
+    def rank_filter_tiles(self, radius, reduce):
+        tiles = self.filter_tiles(None, per_pixel=True)
+        channels = tiles.view(np.uint8).reshape(tiles.shape + (4,))  # RGBX-Pixel als einzelne Kanäle
+        filtered = rank_filter(channels, radius, reduce, axes=(1, 2))  # Ränder jedes Teils bleiben getrennt
+        return filtered.view(np.uint32).reshape(tiles.shape)
+
+    # Setzt das Bild aus den (gefilterten) Quellteilen in der gemischten Reihenfolge zusammen
+    def compose(self, tiles, image_size):
+        grid, tile_width, tile_height = self.grid_size, self.tile_width, self.tile_height
+        if tile_width != tile_height and any(rotation % 180 for rotation in self.rotations):
+            # Gedrehte, nicht quadratische Teile überlappen sich und werden wie bisher eingefügt
+            return self.compose_with_paste(tiles, image_size)
+
+        width, height = image_size
+        if self._buffer is None or self._buffer.shape != (height, width):
+            self._buffer = np.zeros((height, width), dtype=np.uint32)  # Rest am Rand bleibt schwarz
+        # Sicht auf den Puffer in der Form (Zeile, Spalte, Höhe, Breite) – ohne Kopie
+        grid_area = self._buffer[:grid * tile_height, :grid * tile_width]
+        target = grid_area.reshape(grid, tile_height, grid, tile_width).swapaxes(1, 2)
+
+        permutation = np.frombuffer(self.permutation, dtype=np.uint16)
+        rotations = np.frombuffer(self.rotations, dtype=np.uint16)
+        for angle in np.unique(rotations):
+            # PIL dreht gegen den Uhrzeigersinn, genau wie np.rot90
+            rotated = np.rot90(tiles, k=int(angle) // 90, axes=(1, 2))
+            if (rotations == angle).all():
+                np.take(rotated, permutation.reshape(grid, grid), axis=0, out=target, mode="clip")
+            else:
+                rows, columns = np.divmod(np.flatnonzero(rotations == angle), grid)
+                target[rows, columns] = rotated[permutation[rows * grid + columns]]
+        return Image.frombytes("RGB", image_size, self._buffer, "raw", "RGBX")
+
+    # Klassische Zusammensetzung mit paste(), für gedrehte nicht quadratische Teile
+    def compose_with_paste(self, tiles, image_size):
+        new_image = Image.new('RGB', image_size)
+        for position, tile_index in enumerate(self.permutation):
+            row, column = divmod(position, self.grid_size)
+            piece = Image.frombytes("RGB", (self.tile_width, self.tile_height), tiles[tile_index], "raw", "RGBX")
+            piece = piece.rotate(self.rotations[position], expand=True)
+            new_image.paste(piece, (column * self.tile_width, row * self.tile_height))
+        return new_image
+
+
+# Speichert alle Unschärfestufen des aktuellen Bildes, die ein Hintergrund-Worker vorberechnet
+class BlurPyramid:
+    def __init__(self):
+        self.key = None  # (Bildschlüssel, Gittergröße, Blur-Typ) der gespeicherten Stufen
+        self.levels = {}  # Unschärfestufe -> berechnetes Ergebnis
+        self.building_key = None  # Schlüssel, für den der Worker gerade rechnet
+        self.generation = 0  # Wird bei jedem Schlüsselwechsel erhöht, um veraltete Arbeit abzubrechen
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blur-pyramid")
+
+    # Verwirft alle Stufen, wenn sich Bild, Canvas-Größe, Gitter oder Blur-Typ geändert haben
+    def _reset(self, key):
+        if key != self.key:
+            self.key = key
+            self.levels = {}
+            self.building_key = None
+            self.generation += 1
+
+    # Gibt das Ergebnis einer Stufe zurück (oder None, wenn es noch nicht berechnet wurde)
+    def get(self, key, level):
+        with self.lock:
+            self._reset(key)
+            return self.levels.get(level)
+
+    # Speichert das Ergebnis einer Stufe, sofern der Schlüssel noch aktuell ist
+    def put(self, key, level, result):
+        with self.lock:
+            if key == self.key:
+                self.levels[level] = result
+
+    # Startet die Berechnung aller fehlenden Stufen im Hintergrund (nächstgelegene Stufen zuerst)
+    def build(self, key, levels, current_level, render):
+        with self.lock:
+            self._reset(key)
+            if self.building_key == key:
+                return
+            self.building_key = key
+            generation = self.generation
+        ordered_levels = sorted(levels, key=lambda level: abs(level - current_level))
+        self.executor.submit(self._build, key, generation, ordered_levels, render)
+
+    # Rechnet im Worker-Thread eine Stufe nach der anderen, bis alle fertig sind oder sich der Schlüssel ändert
+    def _build(self, key, generation, levels, render):
+        for level in levels:
+            with self.lock:
+                if generation != self.generation:
+                    return  # Bild oder Blur-Typ wurde inzwischen gewechselt
+                if level in self.levels:
+                    continue
+            self.put(key, level, render(level))
+
+    # Verwirft alle gespeicherten Stufen
+    def clear(self):
+        with self.lock:
+            self._reset(None)
+
+    # Bricht eine laufende Berechnung nach der aktuellen Stufe ab und beendet den Worker-Thread
+    def shutdown(self):
+        self.clear()  # Neue Generation: der Worker prüft sie vor jeder Stufe
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
 
-BLUR_METHODS = ["gaussian", "box", "min", "max", "grayscale", "solarize", "posterize", "invert"]
 # Klasse zur Bildverarbeitung
 class ImageProcessor:
-    def __init__(self, image_folder):
+    def __init__(self, image_folder, cache_size_mb=256, prefetch_count=3, precompute_levels=False,
+                 tile_workers=None, tile_processes=False, image_files=None,
+                 disk_cache_folder=None, disk_cache_size_mb=1024, cache_effects=False,
+                 image_index=None, min_resolution=0, orientation=None, tile_cache_size_mb=64,
+                 export_memory_mb=256):
         self.image_folder = image_folder
-        self.image_files = [os.path.join(image_folder, file) for file in os.listdir(image_folder) if file.lower().endswith(('png', 'jpg', 'jpeg'))]
+        self.image_index = image_index  # Optionaler ImageIndex statt os.listdir
+        self.image_index_version = None  # Stand des Index, aus dem image_files erzeugt wurde
+        self.filter_fallback = False  # Werden vorläufig alle Bilder gezeigt, weil die Metadaten noch fehlen?
+        self.min_resolution = min_resolution  # Filter: Mindestanzahl Pixel
+        self.orientation = orientation  # Filter: "landscape", "portrait" oder "square"
+        self.image_files = image_files or []
+        if image_files is None and image_index is None:
+            self.image_files = [os.path.join(image_folder, file) for file in os.listdir(image_folder) if file.lower().endswith(IMAGE_EXTENSIONS)]
+        elif image_files is None:
+            self.refresh_image_files()
         self.start_blur_level = 0  # Startwert für die Unschärfe, standardmäßig kein Blur
         self.max_blur_level = 24  # Maximale Unschärfe
         self.min_blur_level = 0  # Minimale Unschärfe
@@ -20,8 +967,18 @@ class ImageProcessor:
         self.split_enabled = True  # Standardmäßig ist das Bild in Rechtecke aufgeteilt
         self.grid_size = 4  # Anzahl der Start Rechtecke
         self.original_image = None  # Speichert das unveränderte Originalbild
-        self.shuffled_pieces = None  # Speichert die gemischten Teile des Bildes
-        self.rotation_angles = []  # Liste der Drehwinkel für jedes Teil
+        self.split_layout = None  # Speichert die Anordnung der gemischten Teile des Bildes
+        self.image_cache = ImageCache(cache_size_mb * 1024 * 1024)  # Cache der skalierten Bilder
+        self.prefetch_count = prefetch_count  # Anzahl der Bilder, die im Voraus geladen werden
+        # Festplatten-Cache für skalierte Bilder und optional für berechnete Effekt-Stufen
+        self.disk_cache = DiskCache(disk_cache_folder, disk_cache_size_mb * 1024 * 1024) if disk_cache_folder else None
+        self.cache_effects = cache_effects
+        self.prefetcher = ImagePrefetcher(self.image_cache, self.load_base_image_cached) if prefetch_count > 0 else None
+        self.original_key = None  # Cache-Schlüssel des aktuell geladenen Originalbildes
+        self.blur_pyramid = BlurPyramid() if precompute_levels else None  # Vorberechnete Unschärfestufen
+        self.tile_executor = TileExecutor(tile_workers, tile_processes)  # Filtert die Bildteile parallel
+        self.tile_cache = TileCache(tile_cache_size_mb * 1024 * 1024)  # Gefilterte Bildteile je Stufe
+        self.export_memory_budget = export_memory_mb * 1024 * 1024  # Arbeitsspeicher zum Filtern eines Exports
 
     # Gibt den Pfad des aktuell ausgewählten Bildes zurück
     def get_current_image_path(self):
@@ -29,125 +986,201 @@ class ImageProcessor:
 
     # Wechselt zum nächsten Bild in der Liste
     def next_image(self):
-        self.current_image_index = (self.current_image_index + 1) % len(self.image_files)
+        self.refresh_image_files()
+        if self.image_files:
+            self.current_image_index = (self.current_image_index + 1) % len(self.image_files)
         self.reset_image_state()
+        self.tile_cache.clear()
+
+    # Übernimmt neue, gelöschte oder geprüfte Bilder aus dem Index und behält die Position in der Liste
+    def refresh_image_files(self):
+        if self.image_index is None:
+            return
+        self.image_index.refresh()
+        if self.image_index.version == self.image_index_version:
+            return
+        self.image_index_version = self.image_index.version
+        image_files = self.image_index.query(self.min_resolution, self.orientation)
+        # Solange die Metadaten noch gelesen werden (z.B. beim ersten Start), kann noch kein Bild zu den Filtern
+        # passen; bis dahin werden vorläufig alle gültigen Bilder gezeigt. Danach bleibt die Liste auch leer.
+        filtered = bool(self.min_resolution or self.orientation)
+        fallback = not image_files and filtered and self.image_index.metadata_pending()
+        if fallback:
+            image_files = self.image_index.query()
+        if fallback != self.filter_fallback:
+            self.filter_fallback = fallback
+            print("Metadaten fehlen noch, die Filter werden vorläufig nicht angewendet" if fallback
+                  else "Metadaten vollständig, die Filter werden angewendet", flush=True)
+        current_path = self.get_current_image_path() if self.image_files else None
+        self.image_files = image_files
+        self.current_image_index = 0
+        if current_path is not None and image_files:
+            # Index des aktuellen Bildes, oder des Bildes davor, falls es nicht mehr in der Liste ist
+            position = bisect.bisect_left(image_files, current_path)
+            if position == len(image_files) or image_files[position] != current_path:
+                position -= 1
+            self.current_image_index = position % len(image_files)
 
     # Setzt den Zustand des Bildes zurück (Unschärfe, Rotation, etc.)
     def reset_image_state(self):
         self.start_blur_level = self.min_blur_level  # Blur wird auf Minimum gesetzt
         self.manual_rotation = 0
         self.original_image = None
-        self.shuffled_pieces = None
-        self.rotation_angles = []  # Zurücksetzen der Rotationen für Teile
+        self.split_layout = None  # Zurücksetzen der Teile und ihrer Rotationen
 
     # Wendet einen Unschärfe-Filter auf das Bild an, wenn ein Blur-Typ ausgewählt ist
     def apply_blur_effect(self, image):
-        if self.blur_type:
-            blur_methods = {
-                "gaussian": ImageFilter.GaussianBlur(radius=self.start_blur_level),
-                "box": ImageFilter.BoxBlur(radius=self.start_blur_level),
-                "min": ImageFilter.MinFilter(size=self.start_blur_level * 2 + 1),
-                "max": ImageFilter.MaxFilter(size=self.start_blur_level * 2 + 1)
-            }
-
-            selected_filter = blur_methods.get(self.blur_type)
-            if selected_filter:
-                return image.filter(selected_filter)
-            elif self.blur_type == "grayscale":
-                return ImageOps.grayscale(image)
-            elif self.blur_type == "solarize":
-                return ImageOps.solarize(image, threshold=128)
-            elif self.blur_type == "posterize":
-                return ImageOps.posterize(image, bits=2)
-            elif self.blur_type == "invert":
-                return ImageOps.invert(image)
-
-        return image  # Return the image unchanged if no blur type is selected
+        return apply_effect(image, self.blur_type, self.start_blur_level)
 
     # Lädt das Originalbild und passt es in die gegebene Canvas-Größe an
     def load_original_image(self, canvas_width, canvas_height):
         image_path = self.get_current_image_path()
 
         if self.original_image is None:
-            image = Image.open(image_path)
-
-            # Exif-Daten auslesen, um die Bildorientierung zu korrigieren
-            try:
-                for orientation in ExifTags.TAGS.keys():
-                    if ExifTags.TAGS[orientation] == 'Orientation':
-                        break
-                exif = image._getexif()
-
-                # Überprüft die Orientierung und dreht das Bild falls nötig
-                if exif is not None:
-                    orientation_value = exif.get(orientation, None)
-                    if orientation_value == 3:
-                        image = image.rotate(180, expand=True)
-                    elif orientation_value == 6:
-                        image = image.rotate(270, expand=True)
-                    elif orientation_value == 8:
-                        image = image.rotate(90, expand=True)
-            except (AttributeError, KeyError, IndexError):
-                pass
-
-            # Bild manuell rotieren, wenn der Benutzer es festgelegt hat
-            image = image.rotate(self.manual_rotation, expand=True)
-            # Bild auf die gewünschte Größe skalieren
-            image = image.resize((canvas_width, canvas_height), Image.LANCZOS)
+            key = ImageCache.make_key(image_path, canvas_width, canvas_height, self.manual_rotation)
+            image = self.image_cache.get(key)
+            if image is None and self.prefetcher is not None:
+                image = self.prefetcher.wait_for(key)  # Wird das Bild gerade vorgeladen?
+            if image is None:
+                try:
+                    image = self.load_base_image_cached(key, image_path, canvas_width, canvas_height, self.manual_rotation)
+                except OSError:
+                    if self.image_index is not None:
+                        self.image_index.mark_invalid(image_path)  # Wird beim nächsten Bildwechsel übersprungen
+                    raise
+                self.image_cache.put(key, image)
             self.original_image = image  # Speichert das Originalbild
+            self.original_key = key
+            self.prefetch_next_images(canvas_width, canvas_height)
         return self.original_image.copy()  # Gibt eine Kopie des Originalbildes zurück
 
+    # Lädt ein skaliertes Bild aus dem Festplatten-Cache oder dekodiert es neu und legt es dort ab
+    def load_base_image_cached(self, key, image_path, canvas_width, canvas_height, manual_rotation):
+        disk_key = ("base", os.path.abspath(image_path)) + key[1:]
+        if self.disk_cache is not None:
+            pixels = self.disk_cache.get(disk_key)
+            if pixels is not None:
+                return Image.fromarray(pixels)
+        image = load_base_image(image_path, canvas_width, canvas_height, manual_rotation)
+        if self.disk_cache is not None:
+            self.disk_cache.put(disk_key, image)
+        return image
+
+    # Lädt die nächsten Bilder der Liste im Hintergrund vor
+    def prefetch_next_images(self, canvas_width, canvas_height):
+        if self.prefetcher is None:
+            return
+        count = min(self.prefetch_count, len(self.image_files) - 1)
+        next_paths = [self.image_files[(self.current_image_index + offset) % len(self.image_files)]
+                      for offset in range(1, count + 1)]
+        self.prefetcher.prefetch(next_paths, canvas_width, canvas_height)
+
     # Lädt das Bild mit dem angewendeten Unschärfe-Effekt
     def load_image_with_blur(self, canvas_width, canvas_height):
-        image = self.load_original_image(canvas_width, canvas_height)
-
-        # Falls die Bildaufteilung aktiviert ist
-        if self.split_enabled:
-            if self.shuffled_pieces is None:
-                # Zerteilt und mischt das Bild, wenn es noch nicht getan wurde
-                self.shuffled_pieces = self.split_and_shuffle_image(image, self.grid_size)
-            # Setzt das Bild aus den unscharfen oder scharfen Teilen neu zusammen
-            return self.reconstruct_image_from_pieces(self.shuffled_pieces, (canvas_width, canvas_height))
-
-        # Wenn keine Rechtecke aktiviert sind, wende den Unschärfe-Effekt auf das gesamte Bild an
-        return self.apply_blur_effect(image)
+        if not self.image_files:
+            return None  # Kein Bild passt zu den Filtern; die Oberfläche zeigt stattdessen einen Hinweis
+        with profiler.span("render"):
+            with profiler.span("load"):
+                image = self.load_original_image(canvas_width, canvas_height)
+
+            # Falls die Bildaufteilung aktiviert ist
+            if self.split_enabled:
+                if self.split_layout is None:
+                    # Zerteilt und mischt das Bild, wenn es noch nicht getan wurde
+                    with profiler.span("split"):
+                        self.split_layout = self.split_and_shuffle_image(image, self.grid_size)
+                # Setzt das Bild aus den unscharfen oder scharfen Teilen neu zusammen
+                return self.reconstruct_image_from_pieces(self.split_layout, (canvas_width, canvas_height))
+
+            # Wenn keine Rechtecke aktiviert sind, wende den Unschärfe-Effekt auf das gesamte Bild an
+            blur_type = self.blur_type
+            return self.render_blur_level(lambda level: apply_effect(image, blur_type, level)).copy()
+
+    # Gibt die möglichen Unschärfestufen zurück
+    def blur_levels(self):
+        return list(range(self.min_blur_level, self.max_blur_level + 1, self.step_size))
+
+    # Berechnet das Ergebnis der aktuellen Unschärfestufe mit render(level) oder holt es aus der Pyramide
+    def render_blur_level(self, render):
+        if self.blur_type is None:
+            return render(self.start_blur_level)
+
+        # Pixel-Effekte hängen nicht von der Stufe ab, daher gibt es für sie nur eine Stufe
+        per_pixel = is_point_effect(self.blur_type)
+        level = self.min_blur_level if per_pixel else self.start_blur_level
+        levels = [level] if per_pixel else self.blur_levels()
+        key = (self.original_key, self.grid_size if self.split_enabled else None, self.blur_type)
+
+        if self.disk_cache is not None and self.cache_effects:
+            render = partial(self.render_with_disk_cache, render, key)
+        if self.blur_pyramid is None:
+            return render(level)
+
+        result = self.blur_pyramid.get(key, level)
+        if result is None:
+            result = render(level)
+            self.blur_pyramid.put(key, level, result)
+        self.blur_pyramid.build(key, levels, level, render)
+        return result
+
+    # Holt eine Effekt-Stufe aus dem Festplatten-Cache oder berechnet und speichert sie
+    def render_with_disk_cache(self, render, key, level):
+        original_key, grid_size, blur_type = key
+        disk_key = ("effect", os.path.abspath(original_key[0])) + original_key[1:] + (grid_size, blur_type, level)
+        pixels = self.disk_cache.get(disk_key)
+        if pixels is not None:
+            # Zerteilte Bilder speichern den Stapel der gefilterten Teile, sonst das ganze Bild
+            return np.array(pixels) if grid_size is not None else Image.fromarray(pixels)
+        result = render(level)
+        self.disk_cache.put(disk_key, result)
+        return result
+
+    # Aktiviert oder deaktiviert die Vorberechnung aller Unschärfestufen
+    def set_precompute_levels(self, state):
+        if state and self.blur_pyramid is None:
+            self.blur_pyramid = BlurPyramid()
+        elif not state and self.blur_pyramid is not None:
+            self.blur_pyramid.shutdown()
+            self.blur_pyramid = None
 
     # Teilt das Bild in Rechtecke und mischt sie
     def split_and_shuffle_image(self, image, grid_size):
-        width, height = image.size
-        piece_width = width // grid_size
-        piece_height = height // grid_size
-
-        pieces = []
-        self.rotation_angles = []  # Initialisiere eine Liste, um die Rotationen der Teile zu speichern
-        for i in range(grid_size):
-            for j in range(grid_size):
-                left = j * piece_width
-                top = i * piece_height
-                right = (j + 1) * piece_width
-                bottom = (i + 1) * piece_height
-                piece = image.crop((left, top, right, bottom))  # Ein Rechteck vom Bild ausschneiden
-                pieces.append(piece)
-                self.rotation_angles.append(0)
-
-        random.shuffle(pieces)  # Die Teile zufällig mischen
-        return pieces, piece_width, piece_height
+        permutation = list(range(grid_size * grid_size))
+        random.shuffle(permutation)  # Die Teile zufällig mischen
+        return SplitLayout(image, grid_size, permutation)
 
     # Setzt das Bild aus den gemischten Teilen wieder zusammen und wendet dynamisch den Unschärfe-Effekt an
-    def reconstruct_image_from_pieces(self, pieces_info, image_size):
-        pieces, piece_width, piece_height = pieces_info
-        new_image = Image.new('RGB', image_size)
-        idx = 0
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                piece = pieces[idx].copy()  # Ein Bildteil kopieren
-                # Wendet den Unschärfe-Effekt auf das Teil an, wenn ein Blur-Typ ausgewählt ist
-                piece = self.apply_blur_effect(piece)
-                # Dreht das Bildteil, wenn eine manuelle Drehung angewendet wurde
-                piece = piece.rotate(self.rotation_angles[idx], expand=True)
-                new_image.paste(piece, (j * piece_width, i * piece_height))  # Das Teil auf das neue Bild positionieren
-                idx += 1
-        return new_image
+    def reconstruct_image_from_pieces(self, split_layout, image_size):
+        with profiler.span("filter_tiles"):
+            if self.blur_type is None:
+                tiles = split_layout.filter_tiles(None, per_pixel=True)
+            else:
+                # Zustand jetzt festhalten: die Pyramide ruft die Funktion später aus ihrem Worker-Thread auf
+                blur_type, original_key = self.blur_type, self.original_key
+                tiles = self.render_blur_level(
+                    lambda level: self.filter_tiles_cached(split_layout, original_key, blur_type, level))
+        with profiler.span("compose"):
+            return split_layout.compose(tiles, image_size)
+
+    # Gibt die gefilterten Quellteile einer Stufe zurück; nur Teile, die nicht im Cache liegen, werden berechnet
+    def filter_tiles_cached(self, split_layout, original_key, blur_type, level):
+        key = (original_key, split_layout.grid_size, blur_type, level)
+        tile_count = split_layout.grid_size ** 2
+        cached_tiles = [self.tile_cache.get(key + (tile_index,)) for tile_index in range(tile_count)]
+        missing = [tile_index for tile_index, tile in enumerate(cached_tiles) if tile is None]
+        if not missing:
+            return np.stack(cached_tiles)
+
+        if blur_type in RANK_FILTERS:
+            # Der Rangfilter rechnet alle Teile in einem Durchlauf, daher lohnt sich keine Auswahl
+            computed = split_layout.rank_filter_tiles(level, RANK_FILTERS[blur_type])[missing]
+        else:
+            computed = split_layout.filter_tiles(partial(apply_effect, blur_type=blur_type, blur_level=level),
+                                                 is_point_effect(blur_type), self.tile_executor, missing)
+        for position, tile_index in enumerate(missing):
+            cached_tiles[tile_index] = computed[position]
+            self.tile_cache.put(key + (tile_index,), computed[position].copy())
+        return computed if len(missing) == tile_count else np.stack(cached_tiles)
 
     # Ändert den Unschärfegrad
     def change_blur_level(self, direction):
@@ -162,7 +1195,7 @@ class ImageProcessor:
         if new_blur_type is None:
             # Keine Unschärfe anwenden (Kein Blur)
             self.blur_type = None
-        elif new_blur_type in BLUR_METHODS:
+        elif is_valid_effect(new_blur_type):
             # Setze den Blur-Typ und den maximalen Blur-Level, wenn vorher kein Blur-Typ aktiv war
             if self.blur_type is None:  # Wenn kein Blur ausgewählt war
                 self.start_blur_level = self.max_blur_level  # Setzt den maximalen Blur-Level
@@ -176,7 +1209,8 @@ class ImageProcessor:
         angle = -90 if direction == "left" else 90
         if self.split_enabled:
             # Drehe jedes Teil des Bildes individuell
-            self.rotation_angles = [(rot_angle + angle) % 360 for rot_angle in self.rotation_angles]
+            if self.split_layout is not None:
+                self.split_layout.rotate(angle)
         else:
             # Dreht das gesamte Bild
             self.manual_rotation = (self.manual_rotation + angle) % 360
@@ -185,8 +1219,8 @@ class ImageProcessor:
     # Aktiviert oder deaktiviert die Bildaufteilung
     def toggle_split(self, state):
         self.split_enabled = state
-        self.shuffled_pieces = None
-        self.rotation_angles = []  # Zurücksetzen der Rotationen für Teile
+        self.split_layout = None  # Zurücksetzen der Teile und ihrer Rotationen
+        self.tile_cache.clear()
 
     # Ändert die Größe des Gitters, das das Bild zerteilt
     def adjust_grid_size(self, direction):
@@ -194,20 +1228,309 @@ class ImageProcessor:
             self.grid_size = min(self.grid_size + 1, 10)
         elif direction == "decrease":
             self.grid_size = max(self.grid_size - 1, 2)
-        self.shuffled_pieces = None  # Setzt gemischte Bildteile zurück
-        self.rotation_angles = []  # Zurücksetzen der Rotationen für Teile
+        self.split_layout = None  # Setzt gemischte Bildteile und ihre Rotationen zurück
+        self.tile_cache.clear()
 
     # Gibt das aktuell verarbeitete Bild zurück
     def get_processed_image_with_effects(self, canvas_width, canvas_height):
         return self.load_image_with_blur(canvas_width, canvas_height)
 
+    # Momentaufnahme des aktuellen Zustands als Exportseite, optional mit einer anderen Unschärfestufe
+    def export_page(self, canvas_width, canvas_height, blur_level=None):
+        tile_layout = None
+        if self.split_enabled:
+            if self.split_layout is None:
+                self.split_layout = self.split_and_shuffle_image(
+                    self.load_original_image(canvas_width, canvas_height), self.grid_size)
+            tile_layout = (self.split_layout.grid_size, array("H", self.split_layout.permutation),
+                           array("H", self.split_layout.rotations))
+        return ExportPage(self.get_current_image_path(), self.manual_rotation, self.blur_type,
+                          self.start_blur_level if blur_level is None else blur_level,
+                          (canvas_width, canvas_height), tile_layout)
+
+    # Eine Exportseite je Unschärfestufe des aktuellen Bildes (Pixel-Effekte und "Kein Blur" haben nur eine)
+    def export_pages_for_levels(self, canvas_width, canvas_height):
+        if self.blur_type is None or is_point_effect(self.blur_type):
+            return [self.export_page(canvas_width, canvas_height)]
+        return [self.export_page(canvas_width, canvas_height, level) for level in self.blur_levels()]
+
+    # Eine Exportseite je Bild der Liste mit den aktuellen Einstellungen; andere Bilder werden neu gemischt
+    def export_pages_for_images(self, canvas_width, canvas_height):
+        current_path = self.get_current_image_path()
+        pages = []
+        for image_path in self.image_files:
+            if image_path == current_path:
+                pages.append(self.export_page(canvas_width, canvas_height))
+                continue
+            tile_layout = None
+            if self.split_enabled:
+                permutation = list(range(self.grid_size * self.grid_size))
+                random.shuffle(permutation)  # Wie beim Wechsel zum Bild: gemischt, aber nicht gedreht
+                tile_layout = (self.grid_size, array("H", permutation), array("H", [0] * len(permutation)))
+            pages.append(ExportPage(image_path, 0, self.blur_type, self.start_blur_level,
+                                    (canvas_width, canvas_height), tile_layout))
+        return pages
+
+# Rendert Bilder in einem Hintergrund-Thread, damit die Oberfläche (und der Timer) flüssig bleibt.
+# Alle Zustandsänderungen am ImageProcessor laufen als Befehle über diesen Thread; bei vielen schnellen
+# Klicks werden alle Befehle ausgeführt, aber nur der neueste Zustand gerendert.
+class RenderWorker:
+    def __init__(self, root, image_processor, canvas_width, canvas_height, on_frame, poll_interval=16):
+        self.root = root
+        self.image_processor = image_processor
+        self.canvas_width = canvas_width
+        self.canvas_height = canvas_height
+        self.on_frame = on_frame  # Wird im Tk-Thread mit jedem fertigen Bild und der Teilgröße aufgerufen
+        self.poll_interval = poll_interval  # Abfrageintervall in ms (16 ms ≈ 60 fps)
+        self.commands = []  # Noch nicht ausgeführte Befehle
+        self.render_requested = False
+        self.generation = 0  # Wird bei jeder Anfrage erhöht, um veraltete Ergebnisse zu erkennen
+        self.finished_frame = None  # Zuletzt fertig gerendertes Bild, das noch angezeigt werden muss
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="render", daemon=True)
+        self.thread.start()
+        self.root.after(self.poll_interval, self._poll)
+
+    # Stellt einen Befehl (Funktion, die den ImageProcessor erhält) und optional ein neues Rendern ein
+    def submit(self, command=None, render=True):
+        with self.condition:
+            if command is not None:
+                self.commands.append(command)
+            if render:
+                self.render_requested = True
+                self.generation += 1
+            self.condition.notify()
+
+    # Hauptschleife des Render-Threads
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.commands and not self.render_requested:
+                    self.condition.wait()
+                commands, self.commands = self.commands, []
+                render, self.render_requested = self.render_requested, False
+                generation = self.generation
+
+            try:
+                for command in commands:
+                    command(self.image_processor)
+                with self.condition:
+                    if not render or generation != self.generation:
+                        continue  # Inzwischen gibt es neuere Klicks, nur der neueste Zustand wird gerendert
+                image = self.image_processor.load_image_with_blur(self.canvas_width, self.canvas_height)
+                split_layout = self.image_processor.split_layout
+                tile_size = (split_layout.tile_width, split_layout.tile_height) if split_layout else None
+            except Exception:
+                traceback.print_exc()  # Fehler ausgeben, aber den Render-Thread weiterlaufen lassen
+                continue
+
+            with self.condition:
+                if generation == self.generation:
+                    self.finished_frame = (image, tile_size)  # Veraltete Ergebnisse werden verworfen
+
+    # Holt fertige Bilder im Tk-Thread ab und plant die nächste Abfrage
+    def _poll(self):
+        with self.condition:
+            frame, self.finished_frame = self.finished_frame, None
+        if frame is not None:
+            self.on_frame(*frame)
+        self.root.after(self.poll_interval, self._poll)
+
+
+# Vergleicht zwei Bilder Teil für Teil und gibt die Boxen der Teile zurück, deren Pixel sich geändert haben
+def changed_tiles(previous, current, tile_width, tile_height):
+    changed = previous != current
+    if changed.ndim == 3:
+        changed = changed.any(axis=2)
+    height, width = changed.shape
+    rows = np.logical_or.reduceat(changed, np.arange(0, height, tile_height), axis=0)
+    grid = np.logical_or.reduceat(rows, np.arange(0, width, tile_width), axis=1)
+    return [(column * tile_width, row * tile_height,
+             min((column + 1) * tile_width, width), min((row + 1) * tile_height, height))
+            for row, column in zip(*np.nonzero(grid))]
+
+
+# Ein Auftrag der Export-Warteschlange: eine oder mehrere Seiten als eine PDF-Datei oder als nummerierte Bildfolge
+class ExportJob:
+    def __init__(self, pages, output_stem, format_type, save_options=None, memory_budget=256 * 1024 * 1024):
+        self.pages = pages
+        self.output_stem = output_stem  # Dateiname ohne Endung, z.B. "saved_image"
+        self.output_path = None  # Freier Dateiname, wird von der ExportQueue reserviert
+        self.format_type = format_type
+        self.save_options = save_options or {}  # z.B. quality, progressive, optimize
+        self.memory_budget = memory_budget
+        self.done = 0  # Anzahl der fertig geschriebenen Seiten
+        self.error = None
+        self.finished = False
+
+    # Pfad einer Seite: eine PDF enthält alle Seiten, andere Formate werden ab zwei Seiten nummeriert
+    def page_path(self, index):
+        if self.format_type == "pdf" or len(self.pages) == 1:
+            return self.output_path
+        stem, extension = os.path.splitext(self.output_path)
+        return f"{stem}-{index + 1:04d}{extension}"
+
+    # Beschreibt die geschriebenen Dateien (bei Bildfolgen die erste und letzte Datei)
+    def saved_files_text(self):
+        if self.page_path(0) == self.output_path:
+            return self.output_path
+        return f"{self.page_path(0)} … {self.page_path(len(self.pages) - 1)}"
+
+    # Rendert und schreibt die Seiten nacheinander, damit immer nur eine Seite im Speicher liegt
+    def run(self):
+        pillow_format = SAVE_FORMATS[self.format_type]
+        try:
+            with PdfWriter(self.output_path, self.save_options) if pillow_format == "PDF" else nullcontext() as pdf:
+                for index, page in enumerate(self.pages):
+                    image = page.render(pillow_format, self.memory_budget)
+                    if pdf is not None:
+                        pdf.add_page(image)
+                    else:
+                        image.save(self.page_path(index), pillow_format, **self.save_options)
+                    del image
+                    self.done = index + 1
+        except Exception as error:
+            traceback.print_exc()
+            self.error = error
+        finally:
+            self.finished = True
+
+
+# Schreibt eine PDF Seite für Seite: jede Seite wird als JPEG (DCTDecode, mit den Encoder-Optionen) direkt in die
+# Datei geschrieben, behalten werden nur die Byte-Positionen der Objekte. Seitenbaum und Querverweistabelle folgen
+# einmal am Ende. Pillows append=True liest dagegen für jede Seite die ganze Datei neu ein.
+class PdfWriter:
+    def __init__(self, path, save_options=None):
+        self.file = open(path, "wb")
+        self.save_options = save_options or {}  # z.B. quality, progressive, optimize
+        self.offsets = [0, None, None]  # Byte-Position je Objektnummer; 1 = Katalog, 2 = Seitenbaum (am Ende)
+        self.page_numbers = []
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, *exception):
+        if exception_type is None:
+            self.close()
+        else:
+            self.file.close()  # Abgebrochener Export: keine Querverweistabelle für eine unvollständige Datei
+
+    # Schreibt ein Objekt (optional mit Datenstrom) und gibt seine Nummer zurück
+    def _write_object(self, dictionary, stream=None, number=None):
+        if number is None:
+            number = len(self.offsets)
+            self.offsets.append(None)
+        self.offsets[number] = self.file.tell()
+        self.file.write(f"{number} 0 obj\n{dictionary}\n".encode("ascii"))
+        if stream is not None:
+            self.file.write(b"stream\n" + stream + b"\nendstream\n")
+        self.file.write(b"endobj\n")
+        return number
+
+    # Hängt ein Bild als Seite an (1 Pixel = 1 Punkt, wie Pillow mit 72 dpi)
+    def add_page(self, image):
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", **self.save_options)
+        jpeg = buffer.getvalue()
+        width, height = image.size
+        color_space = "/DeviceGray" if image.mode == "L" else "/DeviceRGB"
+        image_number = self._write_object(
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace {color_space} "
+            f"/BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>", jpeg)
+        content = f"q {width} 0 0 {height} 0 0 cm /Image Do Q".encode("ascii")
+        content_number = self._write_object(f"<< /Length {len(content)} >>", content)
+        self.page_numbers.append(self._write_object(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+            f"/Resources << /XObject << /Image {image_number} 0 R >> >> /Contents {content_number} 0 R >>"))
+
+    # Schreibt Seitenbaum, Katalog und Querverweistabelle und schließt die Datei
+    def close(self):
+        kids = " ".join(f"{number} 0 R" for number in self.page_numbers)
+        self._write_object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_numbers)} >>", number=2)
+        self._write_object("<< /Type /Catalog /Pages 2 0 R >>", number=1)
+        xref_offset = self.file.tell()
+        self.file.write(f"xref\n0 {len(self.offsets)}\n0000000000 65535 f \n".encode("ascii"))
+        for offset in self.offsets[1:]:
+            self.file.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+        self.file.write(f"trailer\n<< /Size {len(self.offsets)} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+                        .encode("ascii"))
+        self.file.close()
+
+
+# Führt Export-Aufträge in einem Worker-Pool aus; die Oberfläche fragt den Fortschritt mit root.after ab
+class ExportQueue:
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self.jobs = []  # Aufträge, deren Fortschritt noch nicht gemeldet wurde
+        self.reserved_paths = set()  # Dateinamen laufender Aufträge, deren Dateien es noch nicht gibt
+        self.lock = threading.Lock()
+
+    # Reserviert einen freien Dateinamen und stellt den Auftrag in die Warteschlange
+    def submit(self, job):
+        with self.lock:
+            # Unter der Sperre, damit zwei schnelle Exporte nie denselben Namen bekommen
+            job.output_path = unique_output_path(job.output_stem, job.format_type, self.reserved_paths)
+            self.reserved_paths.add(job.output_path)
+            self.jobs.append(job)
+        self.executor.submit(self._run, job)
+        return job
+
+    # Führt einen Auftrag aus und gibt danach seinen Namen frei (die Dateien existieren dann)
+    def _run(self, job):
+        try:
+            job.run()
+        finally:
+            with self.lock:
+                self.reserved_paths.discard(job.output_path)
+
+    # Gibt den Fortschritt aller offenen Aufträge als Text zurück und vergisst fertige Aufträge
+    def status_text(self):
+        with self.lock:
+            jobs, self.jobs = self.jobs, [job for job in self.jobs if not job.finished]
+        if not jobs:
+            return None
+        running = [job for job in jobs if not job.finished]
+        failed = [job for job in jobs if job.error is not None]
+        if failed:
+            return f"Export fehlgeschlagen: {failed[-1].error}"
+        if not running:
+            return f"Gespeichert: {jobs[-1].saved_files_text()}"
+        done = sum(job.done for job in running)
+        total = sum(len(job.pages) for job in running)
+        return f"Export: {done}/{total} Seiten"
+
+
+# Gibt einen freien Dateinamen zurück (saved_image.jpg, saved_image-2.jpg, ...), auch für nummerierte Bildfolgen;
+# Namen in reserved sind bereits an laufende Aufträge vergeben
+def unique_output_path(stem, extension, reserved=()):
+    counter = 1
+    while True:
+        candidate = stem if counter == 1 else f"{stem}-{counter}"
+        path = f"{candidate}.{extension}"
+        if path not in reserved and not os.path.exists(path) and not os.path.exists(f"{candidate}-0001.{extension}"):
+            return path
+        counter += 1
+
+
 # Klasse zur grafischen Benutzeroberfläche (GUI)
 class GUI:
-    def __init__(self, root, image_processor):
+    def __init__(self, root, image_processor, show_profiler_overlay=False):
         self.root = root
         self.image_processor = image_processor
+        self.show_profiler_overlay = show_profiler_overlay  # Messwerte über dem Bild anzeigen
+        self.profiler_overlay = None  # Canvas-Textelement der Messwerte
         self.current_image = None
+        self.photo = None  # Einzige PhotoImage der Anzeige, wird in place aktualisiert
+        self.canvas_item = None  # Einziges Bildelement auf dem Canvas
+        self.empty_text = None  # Hinweis auf dem Canvas, wenn kein Bild zu den Filtern passt
+        self.frame_pixels = None  # Pixel des angezeigten Bildes, um geänderte Teile zu finden
+        self.frame_mode = None
+        self.scratch_photos = {}  # Hilfs-PhotoImages in Teilgröße, nach Größe
         self.start_time = 0  # Startzeit des Timers
+        self.export_queue = ExportQueue()  # Speichert Bilder im Hintergrund
         self.canvas_width = 600  # Breite des Bildbereichs (Canvas)
         self.canvas_height = 600  # Höhe des Bildbereichs (Canvas)
 
@@ -225,9 +1548,13 @@ class GUI:
         # Erstellt die Buttons und Widgets für die Interaktionen
         self.create_widgets()
 
+        # Hintergrund-Thread, der die Bilder berechnet
+        self.render_worker = RenderWorker(self.root, self.image_processor, self.canvas_width, self.canvas_height, self.show_frame)
+
         # Zeigt das erste Bild an und startet den Timer
         self.display_image()
         self.start_timer()
+        self.update_export_progress()
 
         # Erstellt die Haupt-Buttons unter dem Bild (Unschärfer, Schärfer, Nächstes Bild)
 
@@ -284,6 +1611,16 @@ class GUI:
         self.split_check.select()  # Standardmäßig aktiviert
         self.split_check.grid(row=3, column=0, padx=5, pady=5, sticky="w")
 
+        # Checkbox, um alle Unschärfestufen im Hintergrund vorzuberechnen
+        self.precompute_check = ctk.CTkCheckBox(side_frame, text="Stufen vorberechnen", command=self.toggle_precompute_levels)
+        if self.image_processor.blur_pyramid is not None:
+            self.precompute_check.select()
+        self.precompute_check.grid(row=4, column=0, padx=5, pady=5, sticky="w")
+
+        # Fortschritt der Export-Warteschlange
+        self.export_label = ctk.CTkLabel(side_frame, text="", wraplength=160, justify="left")
+        self.export_label.grid(row=5, column=0, padx=5, pady=5, sticky="w")
+
         # Timer oben rechts im Fenster platzieren
         self.timer_label = ctk.CTkLabel(self.root, text="Zeit: 00:00", font=("Arial", 25), fg_color="white", text_color="black", corner_radius=15)
         self.timer_label.grid(row=0, column=1, sticky="ne", padx=20, pady=20)
@@ -295,54 +1632,117 @@ class GUI:
             self.button_blurrier.configure(state="disabled")
             self.button_sharper.configure(state="disabled")
             # Entfernt den Blur-Effekt
-            self.image_processor.change_blur_type(None)  # Keine Unschärfe
+            self.render_worker.submit(lambda processor: processor.change_blur_type(None))  # Keine Unschärfe
         elif selected_blur_type in BLUR_METHODS:
             # Aktiviert die Schärfer-/Unschärfer-Buttons
             self.button_blurrier.configure(state="normal")
             self.button_sharper.configure(state="normal")
             # Setzt den ausgewählten Blur-Typ und wendet ihn auf das Bild an
-            self.image_processor.change_blur_type(selected_blur_type)
-
-        # Aktualisiert die Anzeige des Bildes
-        self.display_image()
+            self.render_worker.submit(lambda processor: processor.change_blur_type(selected_blur_type))
+        else:
+            # Aktualisiert die Anzeige des Bildes
+            self.display_image()
 
-    # Zeigt das aktuelle Bild auf der Leinwand (Canvas) an
+    # Fordert ein neues Bild vom Render-Thread an; es wird angezeigt, sobald es fertig ist
     def display_image(self):
-        image = self.image_processor.load_image_with_blur(self.canvas_width, self.canvas_height)  # Bild mit Unschärfe laden
-        img = ImageTk.PhotoImage(image)  # In ein format umwandeln, das tkinter anzeigen kann
-        self.canvas.create_image(0, 0, anchor="nw", image=img)  # Bild auf dem Canvas platzieren
-        self.canvas.image = img  # Das Bild speichern, damit es nicht vom Garbage Collector entfernt wird
+        self.render_worker.submit()
+
+    # Zeigt ein fertig gerendertes Bild auf der Leinwand (Canvas) an
+    # Es gibt nur ein Canvas-Element und eine PhotoImage; im Split-Modus werden nur geänderte Teile übertragen
+    def show_frame(self, image, tile_size=None):
+        if image is None:
+            self.show_empty_state()
+            return
+        if self.empty_text is not None:
+            self.canvas.itemconfigure(self.empty_text, state="hidden")
+            if self.canvas_item is not None:
+                self.canvas.itemconfigure(self.canvas_item, state="normal")
+        with profiler.span("photoimage"):
+            pixels = np.asarray(image)
+            if self.photo is None or self.photo.width() != image.width or self.photo.height() != image.height \
+                    or self.frame_mode != image.mode:
+                # Neue Größe oder neuer Modus: PhotoImage ersetzen, das Canvas-Element bleibt dasselbe
+                self.photo = ImageTk.PhotoImage(image)  # In ein format umwandeln, das tkinter anzeigen kann
+                if self.canvas_item is None:
+                    self.canvas_item = self.canvas.create_image(0, 0, anchor="nw", image=self.photo)
+                else:
+                    self.canvas.itemconfigure(self.canvas_item, image=self.photo)
+                self.scratch_photos.clear()
+            elif tile_size is None:
+                if not np.array_equal(self.frame_pixels, pixels):
+                    self.photo.paste(image)
+            else:
+                boxes = changed_tiles(self.frame_pixels, pixels, *tile_size)
+                tile_count = -(-image.width // tile_size[0]) * -(-image.height // tile_size[1])
+                if len(boxes) * 2 > tile_count:
+                    self.photo.paste(image)  # Mehr als die Hälfte geändert: ganzes Bild übertragen
+                else:
+                    for box in boxes:
+                        self.paste_tile(image.crop(box), box[0], box[1])
+            self.frame_pixels = pixels
+            self.frame_mode = image.mode
+        self.update_profiler_overlay()
+
+    # Zeigt statt eines Bildes einen Hinweis an, wenn kein Bild zu den Filtern passt
+    def show_empty_state(self):
+        if self.empty_text is None:
+            self.empty_text = self.canvas.create_text(self.canvas_width // 2, self.canvas_height // 2, fill="gray",
+                                                      font=("Arial", 16), width=self.canvas_width - 40,
+                                                      text="Kein Bild passt zu den Filtern (--min-resolution, --orientation)")
+        self.canvas.itemconfigure(self.empty_text, state="normal")
+        if self.canvas_item is not None:
+            self.canvas.itemconfigure(self.canvas_item, state="hidden")
+
+    # Überträgt ein Teil über eine Hilfs-PhotoImage und den Tk-Befehl "copy" an seine Position
+    def paste_tile(self, tile, x, y):
+        key = (tile.mode, tile.size)
+        scratch = self.scratch_photos.get(key)
+        if scratch is None:
+            if len(self.scratch_photos) >= 8:
+                self.scratch_photos.clear()  # Nach einem Wechsel der Gittergröße alte Größen freigeben
+            scratch = self.scratch_photos[key] = ImageTk.PhotoImage(tile.mode, tile.size)
+        scratch.paste(tile)
+        self.root.tk.call(str(self.photo), "copy", str(scratch), "-to", x, y)
+
+    # Zeigt die gemessenen Zeiten (p50/p95) pro Abschnitt über dem Bild an, wenn die Messung aktiv ist
+    def update_profiler_overlay(self):
+        if not self.show_profiler_overlay:
+            return
+        if self.profiler_overlay is None:
+            self.profiler_overlay = self.canvas.create_text(8, 8, anchor="nw", fill="yellow", font=("Courier", 10))
+        self.canvas.itemconfigure(self.profiler_overlay, text=profiler.summary_text())
+        self.canvas.tag_raise(self.profiler_overlay)  # Bleibt über dem Bild sichtbar
 
     # Wechselt zum nächsten Bild und zeigt es an
     def next_image(self):
-        self.image_processor.next_image()  # Bild wechseln
-        self.display_image()  # Neues Bild anzeigen
+        self.render_worker.submit(lambda processor: processor.next_image())  # Bild wechseln und anzeigen
         self.start_timer()  # Timer für das neue Bild zurücksetzen und starten
 
     # Ändert den Unschärfegrad und zeigt das Bild neu an
     def change_blur_level(self, direction):
-        self.image_processor.change_blur_level(direction)  # Unschärfe erhöhen/verringern
-        self.display_image()  # Bild mit neuem Unschärfegrad anzeigen
+        self.render_worker.submit(lambda processor: processor.change_blur_level(direction))  # Unschärfe erhöhen/verringern
 
     # Dreht das Bild nach links oder rechts und zeigt es neu an
     def rotate_image(self, direction):
-        self.image_processor.rotate_image(direction)  # Bild rotieren
-        self.display_image()  # Bild mit neuer Rotation anzeigen
+        self.render_worker.submit(lambda processor: processor.rotate_image(direction))  # Bild rotieren
 
     # Ändert den Unschärfetyp und zeigt das Bild neu an
     def change_blur_type(self, new_blur_type):
-        self.image_processor.change_blur_type(new_blur_type)  # Unschärfetyp ändern
-        self.display_image()  # Bild mit neuem Unschärfetyp anzeigen
+        self.render_worker.submit(lambda processor: processor.change_blur_type(new_blur_type))  # Unschärfetyp ändern
 
     # Aktiviert oder deaktiviert das Zerteilen des Bildes
     def toggle_split(self):
-        self.image_processor.toggle_split(self.split_check.get())  # Bild zerteilen/zusammenfügen
-        self.display_image()  # Neues Bild anzeigen
+        state = self.split_check.get()
+        self.render_worker.submit(lambda processor: processor.toggle_split(state))  # Bild zerteilen/zusammenfügen
+
+    # Aktiviert oder deaktiviert die Vorberechnung der Unschärfestufen
+    def toggle_precompute_levels(self):
+        state = self.precompute_check.get()
+        self.render_worker.submit(lambda processor: processor.set_precompute_levels(state), render=False)
 
     # Ändert die Anzahl der Bildteile (Grid-Größe) und zeigt das Bild neu an
     def adjust_grid_size(self, direction):
-        self.image_processor.adjust_grid_size(direction)  # Grid-Größe ändern
-        self.display_image()  # Bild mit neuer Grid-Größe anzeigen
+        self.render_worker.submit(lambda processor: processor.adjust_grid_size(direction))  # Grid-Größe ändern
 
     # Startet den Timer für die Anzeige eines Bildes
     def start_timer(self):
@@ -366,6 +1766,23 @@ class GUI:
         label = ctk.CTkLabel(save_dialog, text="Wähle das Speicherformat:", font=("Arial", 12))
         label.pack(padx=20, pady=10)
 
+        # Auswahl, was gespeichert wird: das aktuelle Bild, alle Unschärfestufen oder alle Bilder
+        self.export_scope_menu = ctk.CTkComboBox(save_dialog, values=["Aktuelles Bild", "Alle Stufen", "Alle Bilder"], state="readonly")
+        self.export_scope_menu.set("Aktuelles Bild")
+        self.export_scope_menu.pack(padx=20, pady=5)
+
+        # Encoder-Optionen für JPG (und die Seiten einer PDF)
+        quality_label = ctk.CTkLabel(save_dialog, text="Qualität: 90")
+        quality_label.pack(padx=20)
+        self.quality_slider = ctk.CTkSlider(save_dialog, from_=50, to=100, number_of_steps=50,
+                                            command=lambda value: quality_label.configure(text=f"Qualität: {int(value)}"))
+        self.quality_slider.set(90)
+        self.quality_slider.pack(padx=20, pady=5)
+        self.progressive_check = ctk.CTkCheckBox(save_dialog, text="Progressiv")
+        self.progressive_check.pack(padx=20, pady=5, anchor="w")
+        self.optimize_check = ctk.CTkCheckBox(save_dialog, text="Optimieren")
+        self.optimize_check.pack(padx=20, pady=5, anchor="w")
+
         # Button zum Speichern im JPG-Format
         jpg_button = ctk.CTkButton(save_dialog, text="Als JPG speichern", command=lambda: self.save_image_with_format('jpg', save_dialog))
         jpg_button.pack(pady=5)
@@ -376,26 +1793,177 @@ class GUI:
 
     # Funktion zum Speichern des Bildes im ausgewählten Format
     def save_image_with_format(self, format_type, dialog):
-        processed_image = self.image_processor.get_processed_image_with_effects(self.canvas_width, self.canvas_height)
-        file_extension = format_type.lower()  # 'jpg' oder 'pdf'
-        file_name = f"saved_image.{file_extension}"
-
-        # Speichere das Bild im gewählten Format
-        if format_type == 'jpg':
-            processed_image.save(file_name, "JPEG")
-        elif format_type == 'pdf':
-            processed_image.save(file_name, "PDF")
-
+        scope = self.export_scope_menu.get()
+        save_options = {"quality": int(self.quality_slider.get()), "progressive": bool(self.progressive_check.get()),
+                        "optimize": bool(self.optimize_check.get())}
+        # Die Seiten werden im Render-Thread erstellt, damit sie den aktuellen Zustand sehen; benannt, gerendert und
+        # gespeichert wird danach in der Export-Warteschlange, damit frühere Exporte nie überschrieben werden
+        self.render_worker.submit(lambda processor: self.queue_export(processor, scope, format_type, save_options),
+                                  render=False)
         dialog.destroy()  # Schließt den Dialog
 
+    # Erstellt die Seiten des Exports und stellt sie in die Warteschlange (wird im Render-Thread ausgeführt)
+    def queue_export(self, image_processor, scope, format_type, save_options):
+        if not image_processor.image_files:
+            return  # Kein Bild passt zu den Filtern, es gibt nichts zu speichern
+        if scope == "Alle Stufen":
+            pages = image_processor.export_pages_for_levels(self.canvas_width, self.canvas_height)
+        elif scope == "Alle Bilder":
+            pages = image_processor.export_pages_for_images(self.canvas_width, self.canvas_height)
+        else:
+            pages = [image_processor.export_page(self.canvas_width, self.canvas_height)]
+        self.export_queue.submit(ExportJob(pages, "saved_image", format_type, save_options,
+                                           image_processor.export_memory_budget))
+
+    # Zeigt den Fortschritt der Export-Warteschlange an (alle 200 ms)
+    def update_export_progress(self):
+        status = self.export_queue.status_text()
+        if status is not None:
+            self.export_label.configure(text=status)
+        self.root.after(200, self.update_export_progress)
+
+
+# Rendert ein einzelnes Bild der Stapelverarbeitung und speichert es (läuft in einem eigenen Prozess)
+def render_batch_image(image_path, output_path, options):
+    start_time = time.perf_counter()
+    # Der Seed hängt vom Dateinamen ab, damit jedes Bild unabhängig von der Reihenfolge gleich gemischt wird
+    random.seed(f"{options.seed}:{os.path.basename(image_path)}")
+    canvas_width, canvas_height = options.size
+
+    processor = ImageProcessor(os.path.dirname(image_path), prefetch_count=0, tile_workers=1, image_files=[image_path])
+    processor.split_enabled = options.grid > 0
+    processor.grid_size = options.grid
+    processor.change_blur_type(None if options.effect == "none" else options.effect)
+    processor.start_blur_level = options.level
+    if processor.split_enabled:
+        # Teile erzeugen und jedes Teil drehen, wie es die Drehknöpfe im zerteilten Modus tun
+        image = processor.load_original_image(canvas_width, canvas_height)
+        processor.split_layout = processor.split_and_shuffle_image(image, processor.grid_size)
+        processor.split_layout.rotate(options.rotation)
+    else:
+        processor.manual_rotation = options.rotation
+
+    processed_image = processor.load_image_with_blur(canvas_width, canvas_height)
+    # Erst in eine temporäre Datei schreiben, damit abgebrochene Läufe keine halben Dateien hinterlassen
+    temporary_path = output_path + ".part"
+    pillow_format = SAVE_FORMATS[options.format]
+    convert_for_format(processed_image, pillow_format).save(temporary_path, pillow_format)
+    os.replace(temporary_path, output_path)
+    return os.path.getsize(image_path), time.perf_counter() - start_time
+
+
+# Verarbeitet alle Bilder eines Ordners ohne Oberfläche in mehreren Prozessen
+def run_batch(options):
+    image_files = sorted(file for file in os.listdir(options.batch) if file.lower().endswith(IMAGE_EXTENSIONS))
+    os.makedirs(options.output, exist_ok=True)
+
+    # Bereits vorhandene Ergebnisse überspringen, damit ein abgebrochener Lauf fortgesetzt werden kann.
+    # Die Endung der Quelle bleibt im Namen (a.png -> a.png.jpg), damit a.jpg und a.png nicht dieselbe Datei ergeben
+    jobs = []
+    for file in image_files:
+        output_path = os.path.join(options.output, f"{file}.{options.format}")
+        if not os.path.exists(output_path):
+            jobs.append((os.path.join(options.batch, file), output_path))
+    print(f"{len(jobs)} von {len(image_files)} Bildern zu verarbeiten ({len(image_files) - len(jobs)} bereits vorhanden)")
+
+    start_time = time.perf_counter()
+    finished = failed = bytes_read = 0
+    max_in_flight = options.workers * 2  # Begrenzt, wie viele Aufträge (und Bilder) gleichzeitig unterwegs sind
+    pending = {}
+    job_iterator = iter(jobs)
+    with ProcessPoolExecutor(max_workers=options.workers) as executor:
+        while True:
+            for image_path, output_path in job_iterator:
+                future = executor.submit(render_batch_image, image_path, output_path, options)
+                pending[future] = image_path
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                image_path = pending.pop(future)
+                finished += 1
+                try:
+                    input_size, duration = future.result()
+                except Exception as error:
+                    failed += 1
+                    print(f"[{finished}/{len(jobs)}] Fehler bei {image_path}: {error}", flush=True)
+                    continue
+                bytes_read += input_size
+                print(f"[{finished}/{len(jobs)}] {image_path} ({duration * 1000:.0f} ms)", flush=True)
+
+    # Durchsatz ausgeben
+    elapsed_time = max(time.perf_counter() - start_time, 1e-9)
+    processed = finished - failed
+    print(f"{processed} Bilder in {elapsed_time:.1f} s: {processed / elapsed_time:.2f} Bilder/s, "
+          f"{bytes_read / elapsed_time / (1024 * 1024):.2f} MB/s, {failed} Fehler")
+    return 1 if failed else 0
+
+
+# Liest eine Größenangabe wie "600x600"
+def parse_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültige Größe: {value} (erwartet z.B. 600x600)")
+    return width, height
+
+
+# Liest eine ganze Zahl, die nicht kleiner als minimum sein darf (für argparse)
+def bounded_int(minimum, value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Keine ganze Zahl: {value}")
+    if number < minimum:
+        raise argparse.ArgumentTypeError(f"Muss mindestens {minimum} sein: {value}")
+    return number
+
+
+# Liest die Kommandozeilenparameter; ohne --batch wird die Oberfläche gestartet
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Bilderraten – ohne Parameter startet die Oberfläche")
+    parser.add_argument("--batch", metavar="ORDNER", help="Alle Bilder des Ordners ohne Oberfläche verarbeiten")
+    parser.add_argument("--output", metavar="ORDNER", default="ausgabe", help="Zielordner der Stapelverarbeitung")
+    parser.add_argument("--effect", choices=["none"] + BLUR_METHODS, default="none", help="Blureffekt")
+    parser.add_argument("--level", type=partial(bounded_int, 0), default=0, help="Unschärfegrad (Radius)")
+    parser.add_argument("--grid", type=partial(bounded_int, 0), default=0, help="Gittergröße zum Zerteilen (0 = nicht zerteilen)")
+    parser.add_argument("--rotation", type=int, choices=[0, 90, 180, 270], default=0, help="Drehung in Grad")
+    parser.add_argument("--seed", type=int, default=0, help="Seed für das Mischen der Teile")
+    parser.add_argument("--size", type=parse_size, default=(600, 600), help="Ausgabegröße, z.B. 600x600")
+    parser.add_argument("--format", choices=list(SAVE_FORMATS), default="jpg", help="Ausgabeformat")
+    parser.add_argument("--workers", type=partial(bounded_int, 1), default=os.cpu_count() or 1, help="Anzahl der Prozesse")
+    parser.add_argument("--min-resolution", type=int, default=0, help="Oberfläche: nur Bilder mit mindestens so vielen Pixeln")
+    parser.add_argument("--orientation", choices=["landscape", "portrait", "square"], help="Oberfläche: nur Bilder dieser Orientierung")
+    parser.add_argument("--export-memory", type=int, default=256, metavar="MB", help="Oberfläche: Arbeitsspeicher zum Filtern eines Exports (zusätzlich zu Original und Ergebnis)")
+    parser.add_argument("--profile", action="store_true", help="Dauer der Verarbeitungsschritte messen und anzeigen")
+    parser.add_argument("--profile-log", metavar="DATEI", help="Messungen als JSON-Lines in diese Datei schreiben")
+    return parser.parse_args(arguments)
+
 
 # Der Hauptteil des Programms, der das Fenster und die GUI startet
 if __name__ == "__main__":
+    arguments = parse_arguments()
+    if arguments.profile or arguments.profile_log:
+        profiler.enable(arguments.profile_log)
+    if arguments.batch:
+        sys.exit(run_batch(arguments))  # Stapelverarbeitung, benötigt kein Display
+
     ctk.set_appearance_mode("dark")  # Setzt den Dark Mode für die GUI
     ctk.set_default_color_theme("blue")  # Setzt das blaue Farbschema
     root = ctk.CTk()
     root.title("Bilderraten")
     image_folder = "Bilder"  # Der Ordner, in dem sich die Bilder befinden
-    image_processor = ImageProcessor(image_folder)
-    app = GUI(root, image_processor)
+    cache_folder = os.path.join(os.path.expanduser("~"), ".cache", "image-blur")  # Überlebt Neustarts
+    os.makedirs(cache_folder, exist_ok=True)
+    # Der Index liegt im Cache-Ordner, da der Bilderordner schreibgeschützt sein kann
+    index_name = hashlib.sha1(os.path.abspath(image_folder).encode("utf-8")).hexdigest()[:16]
+    image_index = ImageIndex(image_folder, os.path.join(cache_folder, f"index-{index_name}.sqlite"))
+    image_processor = ImageProcessor(image_folder, disk_cache_folder=cache_folder, image_index=image_index,
+                                     min_resolution=arguments.min_resolution, orientation=arguments.orientation,
+                                     export_memory_mb=arguments.export_memory)
+    image_index.start_background_refresh()
+    app = GUI(root, image_processor, show_profiler_overlay=arguments.profile)
     root.mainloop()  # Startet die Hauptschleife der GUI
@@ -0,0 +1,291 @@
+import argparse
+import importlib.util
+import multiprocessing
+import json  # Maschinenlesbare Ergebnisse
+import os
+import platform
+import random
+import resource  # Maximaler Speicherverbrauch des Prozesses (RSS)
+import statistics
+import sys
+import tempfile
+import time  # Zum Messen der Zeit
+import tracemalloc  # Zählt Speicheranforderungen aus Python und numpy
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import PIL
+from PIL import Image, ImageFilter  # Bibliothek für Bildverarbeitung
+
+# Größen der synthetischen Testbilder (Breite, Höhe)
+IMAGE_SIZES = {
+    "vga": (640, 480),
+    "2mp": (1600, 1200),
+    "12mp": (4000, 3000),
+    "24mp": (6000, 4000),
+    "50mp": (8192, 6144),
+}
+CANVAS_SIZE = (600, 600)  # Größe des Bildbereichs in der Oberfläche
+RSS_NOISE_MB = 10  # Kleinere Änderungen des RSS-Anstiegs gelten nicht als Regression
+
+
+# Lädt "Image Blur.py" als Modul (der Dateiname enthält ein Leerzeichen und lässt sich nicht importieren)
+def load_image_blur():
+    if "image_blur" in sys.modules:
+        return sys.modules["image_blur"]
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Image Blur.py")
+    spec = importlib.util.spec_from_file_location("image_blur", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["image_blur"] = module  # Damit Funktionen für Prozess-Pools gepickelt werden können
+    spec.loader.exec_module(module)
+    return module
+
+
+# Misst die mittlere Laufzeit einer Funktion in Millisekunden
+def measure(function, repeat):
+    function()  # Aufwärmen
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+# Maximaler RSS des Prozesses in MB. Jeder Fall läuft in einem eigenen Prozess, daher ist das der Spitzenwert
+# genau dieses Falls. Unter Linux zählt VmHWM, denn ru_maxrss übernimmt den Spitzenwert des Elternprozesses
+# über fork und exec hinweg; sonst ru_maxrss (Linux liefert KB, macOS Bytes)
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Misst einen Fall: Laufzeit (Median), maximalen RSS und Speicheranforderungen
+def run_case(function, repeat, setup=None):
+    timings = []
+    for _ in range(repeat + 1):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        function(state)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = timings[1:]  # Der erste Lauf dient zum Aufwärmen
+
+    # Speicheranforderungen in einem eigenen Lauf zählen, da tracemalloc die Laufzeit verfälscht
+    state = setup() if setup else None
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    function(state)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "traced_peak_kb": round(traced_peak / 1024, 1),
+        "allocated_blocks": sys.getallocatedblocks() - blocks_before,
+    }
+
+
+# Erzeugt ein reproduzierbares Testbild mit Verläufen und Rauschen und speichert es als JPEG
+def create_synthetic_image(path, size, seed):
+    width, height = size
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[..., 0] = x
+    pixels[..., 1] = y
+    pixels[..., 2] = ((x + y) / 2).astype(np.uint8)
+    pixels += rng.integers(0, 32, (height, width, 1), dtype=np.uint8)  # Etwas Struktur für den Encoder
+    Image.fromarray(pixels).save(path, "JPEG", quality=90)
+
+
+# Erzeugt einen ImageProcessor ohne Caches im Hintergrund, damit jede Messung dieselbe Arbeit misst
+def create_processor(image_blur, image_path):
+    return image_blur.ImageProcessor(os.path.dirname(image_path), prefetch_count=0, tile_workers=1,
+                                     image_files=[image_path])
+
+
+# Liste aller Fälle der Matrix als (Name, Art, Parameter); die Fälle selbst werden erst im Messprozess gebaut
+def build_cases(image_blur, size_names, levels):
+    cases = [(f"load_original_image/{name}", "load", (name,)) for name in size_names]
+    cases += [(f"apply_blur_effect/{blur_type}/{level}", "effect", (blur_type, level))
+              for blur_type in image_blur.BLUR_METHODS for level in levels]
+    cases += [(f"split_reconstruct/{blur_type or 'none'}/{grid_size}", "split", (blur_type, grid_size))
+              for blur_type in (None, "gaussian") for grid_size in range(2, 11)]
+    # Speichern wie in der Oberfläche: Export in voller Auflösung über die Export-Warteschlange
+    cases += [(f"save/{format_type}/{name}", "save", (format_type, name, 1))
+              for format_type in ("jpg", "pdf") for name in size_names]
+    # Mehrseitige PDF ("Alle Stufen", "Alle Bilder"): Zeit und Speicher je Seite müssen konstant bleiben
+    cases += [(f"save/pdf-{page_count}-pages/{size_names[0]}", "save", ("pdf", size_names[0], page_count))
+              for page_count in (10, 100)]
+    return cases
+
+
+# Baut die zu messende Funktion eines Falls und ihre Vorbereitung (setup wird nicht mitgemessen)
+def prepare_case(image_blur, kind, parameters, image_paths, seed, folder):
+    base_path = next(iter(image_paths.values()))
+    if kind == "load":
+        return (lambda processor: processor.load_original_image(*CANVAS_SIZE),
+                lambda: create_processor(image_blur, image_paths[parameters[0]]))
+
+    base_image = create_processor(image_blur, base_path).load_original_image(*CANVAS_SIZE)
+    if kind == "effect":
+        blur_type, level = parameters
+        return lambda _: image_blur.apply_effect(base_image, blur_type, level), None
+
+    if kind == "split":
+        blur_type, grid_size = parameters
+
+        def setup():
+            random.seed(seed)  # Fester Seed, damit die Teile immer gleich gemischt werden
+            processor = create_processor(image_blur, base_path)
+            processor.blur_type = blur_type
+            processor.start_blur_level = 8
+            return processor
+
+        def split_and_reconstruct(processor):
+            split_layout = processor.split_and_shuffle_image(base_image, grid_size)
+            processor.reconstruct_image_from_pieces(split_layout, CANVAS_SIZE)
+
+        return split_and_reconstruct, setup
+
+    format_type, name, page_count = parameters
+
+    def setup():
+        random.seed(seed)
+        processor = create_processor(image_blur, image_paths[name])
+        processor.change_blur_type("gaussian")
+        processor.start_blur_level = 8
+        processor.load_image_with_blur(*CANVAS_SIZE)
+        processor.rotate_image("right")
+        return image_blur.ExportQueue(max_workers=1), processor.export_page(*CANVAS_SIZE)
+
+    def save(state):
+        export_queue, page = state
+        job = image_blur.ExportJob([page] * page_count, os.path.join(folder, "saved_image"), format_type)
+        export_queue.submit(job)
+        export_queue.executor.shutdown(wait=True)
+        if job.error is not None:
+            raise job.error
+        os.remove(job.output_path)
+
+    return save, setup
+
+
+# Misst einen Fall in einem frischen Prozess, damit der maximale RSS nur zu diesem Fall gehört
+def measure_case(kind, parameters, repeat, seed, image_paths, folder):
+    image_blur = load_image_blur()
+    baseline_rss = peak_rss_mb()  # Interpreter, numpy, Pillow und "Image Blur.py"
+    function, setup = prepare_case(image_blur, kind, parameters, image_paths, seed, folder)
+    result = run_case(function, repeat, setup)
+    result["rss_increase_mb"] = round(result["peak_rss_mb"] - baseline_rss, 1)
+    return result
+
+
+# Führt alle Fälle der Matrix aus, jeden in einem eigenen Prozess, und gibt die Ergebnisse zurück
+def run_suite(image_blur, size_names, repeat, seed, folder):
+    image_paths = {}
+    for index, name in enumerate(size_names):
+        image_paths[name] = os.path.join(folder, f"{name}.jpg")
+        create_synthetic_image(image_paths[name], IMAGE_SIZES[name], seed + index)
+
+    results = {}
+    context = multiprocessing.get_context("spawn")  # Frischer Prozess ohne geerbten Speicher
+    levels = create_processor(image_blur, image_paths[size_names[0]]).blur_levels()
+    for name, kind, parameters in build_cases(image_blur, size_names, levels):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[name] = executor.submit(measure_case, kind, parameters, repeat, seed, image_paths, folder).result()
+        print(f"{name:<40} {results[name]['wall_ms']:>10.2f} ms  {results[name]['peak_rss_mb']:>8.1f} MB"
+              f"  (+{results[name]['rss_increase_mb']:.1f} MB)", flush=True)
+    return results
+
+
+# Vergleicht die Ergebnisse mit einer gespeicherten Basislinie und gibt die Regressionen zurück.
+# Beim Speicher zählt der RSS-Anstieg des Falls (ohne Interpreter und Bibliotheken), mindestens RSS_NOISE_MB
+def compare_with_baseline(results, baseline, time_threshold, rss_threshold):
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        time_change = result["wall_ms"] / max(reference["wall_ms"], 1e-6) - 1
+        if time_change > time_threshold:
+            regressions.append(f"{name}: Zeit {reference['wall_ms']:.2f} -> {result['wall_ms']:.2f} ms ({time_change:+.0%})")
+        if "rss_increase_mb" not in reference:
+            continue  # Basislinie aus einer älteren Version ohne Messung pro Fall
+        rss_growth = result["rss_increase_mb"] - reference["rss_increase_mb"]
+        if rss_growth > rss_threshold * max(reference["rss_increase_mb"], RSS_NOISE_MB):
+            regressions.append(f"{name}: RSS-Anstieg {reference['rss_increase_mb']:.1f} -> {result['rss_increase_mb']:.1f} MB")
+    return regressions
+
+
+# Misst min, max und box für jeden Radius; die Zeiten sollten über alle Radien gleich bleiben
+def benchmark_filters(image_blur, size, radii, repeat, compare):
+    rng = np.random.default_rng(0)  # Fester Seed, damit die Messungen vergleichbar sind
+    image = Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+
+    columns = ["min", "max", "box"] + (["Pillow min"] if compare else [])
+    print(f"Bildgröße {size}×{size}, Zeiten in ms")
+    print("Radius" + "".join(f"{column:>12}" for column in columns))
+    for radius in radii:
+        timings = [measure(lambda: image_blur.apply_effect(image, blur_type, radius), repeat)
+                   for blur_type in ("min", "max", "box")]
+        if compare:
+            # Zum Vergleich der bisherige MinFilter, dessen Aufwand mit dem Radius wächst
+            timings.append(measure(lambda: image.filter(ImageFilter.MinFilter(radius * 2 + 1)), 1))
+        print(f"{radius:>6}" + "".join(f"{timing:>12.1f}" for timing in timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks für Image Blur (laufen ohne Display)")
+    parser.add_argument("mode", nargs="?", choices=["suite", "filters"], default="suite",
+                        help="suite: gesamte Matrix, filters: min/max/box über alle Radien")
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen pro Messung")
+    parser.add_argument("--seed", type=int, default=0, help="Seed für Testbilder und Mischen der Teile")
+    parser.add_argument("--sizes", default=",".join(IMAGE_SIZES), help="Bildgrößen, z.B. vga,2mp,12mp")
+    parser.add_argument("--output", default="bench_results.json", help="Datei für die Ergebnisse")
+    parser.add_argument("--baseline", help="Ergebnisse, mit denen verglichen wird")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Erlaubte Verlangsamung (0.10 = 10 %%)")
+    parser.add_argument("--rss-threshold", type=float, default=0.20, help="Erlaubte Zunahme des RSS-Anstiegs pro Fall")
+    parser.add_argument("--size", type=int, default=600, help="filters: Kantenlänge des Testbildes in Pixeln")
+    parser.add_argument("--max-radius", type=int, default=24, help="filters: größter gemessener Radius")
+    parser.add_argument("--compare", action="store_true", help="filters: auch den (langsamen) Pillow-MinFilter messen")
+    args = parser.parse_args()
+
+    image_blur = load_image_blur()
+    if args.mode == "filters":
+        benchmark_filters(image_blur, args.size, range(1, args.max_radius + 1), args.repeat, args.compare)
+        sys.exit(0)
+
+    size_names = [name.strip() for name in args.sizes.split(",") if name.strip()]
+    unknown_sizes = [name for name in size_names if name not in IMAGE_SIZES]
+    if unknown_sizes:
+        parser.error(f"Unbekannte Bildgrößen: {', '.join(unknown_sizes)}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        results = run_suite(image_blur, size_names, args.repeat, args.seed, folder)
+
+    report = {
+        "meta": {"python": platform.python_version(), "pillow": PIL.__version__, "numpy": np.__version__,
+                 "platform": platform.platform(), "cpu_count": os.cpu_count(), "seed": args.seed,
+                 "repeat": args.repeat, "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Ergebnisse gespeichert: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare_with_baseline(results, baseline, args.threshold, args.rss_threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(f"{len(regressions)} Regressionen gegenüber {args.baseline}")
+        sys.exit(1 if regressions else 0)